@@ -5,7 +5,17 @@ from ..pygame import audio
 
 def main(poll_interval=0.25):
 
-    # Chord tracking
+    # Chord tracking: print each new chord as soon as the tracker computes it
+    last_chord = None
+
+    def on_chord(preds):
+        nonlocal last_chord
+        chord_prediction = preds[0][0] if preds else None
+        if chord_prediction is not None and chord_prediction != last_chord:
+            print(chord_prediction)
+        last_chord = chord_prediction
+
+    unsubscribe = chord_tracking.subscribe(on_chord)
     chord_tracking.start_in_background(show_windows=False)
 
     # Start audio capture/processing
@@ -14,21 +24,16 @@ def main(poll_interval=0.25):
     try:
         while True:
 
-            # Chord prediction
-            chord_prediction = chord_tracking.get_prediction()
-            if chord_prediction is not None:
-                print(chord_prediction)
-
-            # Pitch prediction
-            pitch_prediction = audio.get_pitch()  # returns note string or None
-            if pitch_prediction is not None:
-                print(pitch_prediction)
+            # Every note plucked since the last poll
+            for note_event in audio.get_note_events():
+                print(note_event.note)
 
 
             time.sleep(poll_interval)
     except KeyboardInterrupt:
         pass
     finally:
+        unsubscribe()
         chord_tracking.stop_background()
         audio.stop_audio_stream()
 
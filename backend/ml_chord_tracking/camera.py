@@ -1,81 +1,136 @@
 import time
 import cv2
-import numpy as np
-from .hand_tracker import compute_features, FINGERS
-from .parameters import CONFIDENCE_THRESHOLD, TOP_K_DISPLAY, SKELETON_COLOR
+from .capture import FrameGrabber
+from .frame_sources import CameraSource
+from .timing import StageTimers
+from .hand_tracker import compute_features_batch, hands_to_array, handedness_of, fretting_hand_index, FINGERS
+from .parameters import TOP_K_DISPLAY, SKELETON_COLOR, OTHER_HAND_COLOR
 from .parameters import FONT, FONT_SCALE_OTHER, THICKNESS_OTHER, TEXT_X, TEXT_Y, TEXT_VERTICAL_SPACING
-from .parameters import DIST_THRESHOLD
 
-def run_camera_loop(submit_frame, get_latest_result, dataset, gui, on_predictions=None, show_windows=False, stop_event=None):
+def run_camera_loop(submit_frame, get_latest_result, dataset, gui, on_predictions=None, show_windows=False, stop_event=None,
+                    recorder=None, cache=None, grabber=None, results=None, timers=None, on_hand_predictions=None,
+                    on_frame=None, window_name="Webcam"):
     """
-    submit_frame(rgb): callable that accepts an RGB numpy array and sends it to MediaPipe.
+    submit_frame(frame): callable that accepts the captured BGR frame and sends it to MediaPipe.
+                         The frame is the grabber's reused buffer: copy or convert it during
+                         the call, don't keep a reference.
     get_latest_result(): callable that returns the latest MediaPipe result (or None).
     dataset: Dataset instance used for logging / predictions.
     gui: object with attributes tracking (bool), interval (float), selected_chord (str).
-    on_predictions: callable(list_of_(label,confidence)) invoked each frame.
+    on_predictions: callable(list_of_(label,confidence)) invoked each frame and each new result,
+                    with the predictions for the fretting hand (see FRETTING_HAND).
     show_windows: whether to create cv2 windows / draw overlays.
     stop_event: optional threading.Event that, when set, will stop the camera loop.
+    recorder: optional SessionRecorder that records the hand landmarks seen each frame.
+    cache: optional PredictionCache used in front of the top-K ranking.
+    grabber: optional started FrameGrabber to take frames from (released on exit);
+             defaults to one reading camera 0.
+    results: optional ResultBuffer; when given it replaces get_latest_result, stale
+             results are skipped and landmarks are mapped back through the region
+             (x0, y0, w, h) of the frame each result came from (the info passed to
+             ResultBuffer.submit, see InferenceInput).
+    timers: optional StageTimers that receive per-stage durations ("features", "knn",
+            "draw", "loop"; the grabber records "capture" and submit_frame may record
+            "convert" and "submit", each timed on its own so stages don't overlap).
+    on_hand_predictions: callable(list_of_hands) invoked just before on_predictions with
+                         one dict per detected hand: {"hand": handedness label, "score":
+                         handedness score, "fretting": bool, "preds": list_of_(label,confidence)}.
+    on_frame: callable(frame) invoked with every new BGR frame before anything is drawn
+              on it (the grabber's buffer: copy it during the call, don't keep it).
+    window_name: title of the cv2 window (with show_windows); only this window is
+                 destroyed on exit, so other loops' windows stay open.
     """
-    cap = cv2.VideoCapture(0)
+    if timers is None:
+        timers = StageTimers()
+    clock = time.perf_counter
+    if grabber is None:
+        grabber = FrameGrabber(CameraSource(0), timers=timers).start()
     if show_windows:
-        cv2.namedWindow("Webcam", cv2.WINDOW_NORMAL)
+        cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
 
     last_logged = 0
 
+    # Wake up on new frames (grabber) and on new recognizer results, instead of polling
+    processed_ts = None
+    last_frame = None
+
+    def woken():
+        if stop_event is not None and stop_event.is_set():
+            return True
+        return results is not None and results.latest_timestamp != processed_ts
+
+    if results is not None:
+        results.add_listener(grabber.wake)
+
     try:
-        # loop until capture closes or stop_event is set
-        while cap.isOpened() and (stop_event is None or not stop_event.is_set()):
-            ret, frame = cap.read()
-            if not ret:
-                break
+        # loop until capture closes or stop_event is set; always process the newest frame
+        while stop_event is None or not stop_event.is_set():
+            frame = grabber.acquire(timeout=0.5, until=woken)
+            new_frame = frame is not None
+            if not new_frame:
+                if not grabber.running:
+                    break
+                if last_frame is None or not woken():
+                    continue
+                # A result arrived between frames: update predictions right away
+                frame = last_frame
+            last_frame = frame
+            loop_start = clock()
 
             h, w, _ = frame.shape
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            draw = show_windows and new_frame
+
+            if new_frame and callable(on_frame):
+                on_frame(frame)
 
             # send to mediapipe (main provides this)
-            if callable(submit_frame):
-                submit_frame(rgb)
+            if new_frame and callable(submit_frame):
+                submit_frame(frame)
 
             latest_result = None
-            if callable(get_latest_result):
+            region = (0, 0, w, h)
+            if results is not None:
+                processed_ts = results.latest_timestamp
+                latest_result, _, result_region = results.latest()
+                if result_region is not None:
+                    region = result_region
+            elif callable(get_latest_result):
                 latest_result = get_latest_result()
 
+            if recorder is not None and new_frame:
+                recorder.record(time.time(), getattr(latest_result, "hand_landmarks", None), w, h, region)
+
             current_features = None
             top_preds_unique = []
+            pts = None
+            fretting = None
+            hand_preds = []
 
             if latest_result and getattr(latest_result, "hand_landmarks", None):
-                hand = latest_result.hand_landmarks[0]
-                raw_pts = [(int(lm.x * w), int(lm.y * h)) for lm in hand]
-                current_features = compute_features(raw_pts)
-
-                # Draw skeleton (if windows enabled)
-                for finger in FINGERS.values():
-                    mcp, pip, dip, tip = finger
-                    for a, b in [(mcp, pip), (pip, dip), (dip, tip)]:
-                        if show_windows:
-                            cv2.line(frame, raw_pts[a], raw_pts[b], SKELETON_COLOR, 2)
-                    for i in finger:
-                        if show_windows:
-                            cv2.circle(frame, raw_pts[i], 5, SKELETON_COLOR, -1)
-
-                # Compute top-K predictions
-                if len(dataset.X) >= TOP_K_DISPLAY:
-                    X_np = np.array(dataset.X)
-                    dists = np.linalg.norm(X_np - current_features, axis=1)
-                    sorted_idx = np.argsort(dists)[:TOP_K_DISPLAY]
-
-                    top_preds = []
-                    for i in sorted_idx:
-                        conf = max(0.0, 1.0 - dists[i] / DIST_THRESHOLD)
-                        if conf > CONFIDENCE_THRESHOLD:
-                            top_preds.append((dataset.y[i], conf))
-
-                    # Remove duplicates while preserving order
-                    seen = set()
-                    for label, conf in top_preds:
-                        if label not in seen:
-                            top_preds_unique.append((label, conf))
-                            seen.add(label)
+                t = clock()
+                # All hands at once, from the unrounded landmarks
+                pts = hands_to_array(latest_result.hand_landmarks, region[2], region[3], region[:2])
+                features = compute_features_batch(pts)
+                handedness = handedness_of(latest_result)
+                fretting = fretting_hand_index(handedness)
+                current_features = features[fretting]
+                t_features = clock()
+                timers.record("features", t_features - t, t_features)
+
+                # Top-K predictions (deduplicated by label) for every hand in one pass
+                if cache is not None:
+                    # Cache slots by handedness (numbered if it repeats, e.g. two players)
+                    slots = [(label, sum(1 for other, _ in handedness[:i] if other == label))
+                             for i, (label, _) in enumerate(handedness)]
+                    per_hand = cache.top_k_many(dataset, features, slots, TOP_K_DISPLAY)
+                else:
+                    per_hand = dataset.top_k_batch(features, TOP_K_DISPLAY)
+                top_preds_unique = per_hand[fretting]
+                hand_preds = [
+                    {"hand": label, "score": score, "fretting": i == fretting, "preds": preds[:TOP_K_DISPLAY]}
+                    for i, ((label, score), preds) in enumerate(zip(handedness, per_hand))
+                ]
+                timers.record("knn", clock() - t_features)
 
                 # Automatic logging
                 current_time = time.time()
@@ -92,11 +147,26 @@ def run_camera_loop(submit_frame, get_latest_result, dataset, gui, on_prediction
                             last_logged = current_time
 
             # Notify main about predictions (headless printing is done by main)
+            if callable(on_hand_predictions):
+                on_hand_predictions(hand_preds)
             if callable(on_predictions):
                 on_predictions(top_preds_unique[:TOP_K_DISPLAY])
 
-            # If windows are enabled, draw overlay text and show
-            if show_windows:
+            # If windows are enabled, draw skeleton and overlay text and show
+            if draw:
+                t = clock()
+                if pts is not None:
+                    for hand_idx, hand_pts in enumerate(pts):
+                        color = SKELETON_COLOR if hand_idx == fretting else OTHER_HAND_COLOR
+                        # integer points only for drawing
+                        raw_pts = [tuple(p) for p in hand_pts.astype(int).tolist()]
+                        for finger in FINGERS.values():
+                            mcp, pip, dip, tip = finger
+                            for a, b in [(mcp, pip), (pip, dip), (dip, tip)]:
+                                cv2.line(frame, raw_pts[a], raw_pts[b], color, 2)
+                            for i in finger:
+                                cv2.circle(frame, raw_pts[i], 5, color, -1)
+
                 for rank, (label, conf) in enumerate(top_preds_unique[:TOP_K_DISPLAY]):
                     text = f"{label} - {conf*100:.0f}%"
                     y = TEXT_Y + rank * TEXT_VERTICAL_SPACING
@@ -107,21 +177,28 @@ def run_camera_loop(submit_frame, get_latest_result, dataset, gui, on_prediction
                     cv2.putText(frame, text, (TEXT_X, y), FONT, FONT_SCALE_OTHER, (0, 0, 0),
                                 THICKNESS_OTHER, lineType=cv2.LINE_AA)
 
-                cv2.imshow("Webcam", frame)
-                if cv2.waitKey(1) & 0xFF == ord("q"):
+                cv2.imshow(window_name, frame)
+                key = cv2.waitKey(1)
+                timers.record("draw", clock() - t)
+                timers.record("loop", clock() - loop_start)
+                if key & 0xFF == ord("q"):
                     break
-                if cv2.getWindowProperty("Webcam", cv2.WND_PROP_VISIBLE) < 1:
+                if cv2.getWindowProperty(window_name, cv2.WND_PROP_VISIBLE) < 1:
                     break
                 # allow an external stop request to break out promptly
                 if stop_event is not None and stop_event.is_set():
                     break
             else:
-                # small sleep to avoid very busy loop in headless mode
-                time.sleep(0.01)
+                timers.record("loop", clock() - loop_start)
 
     except KeyboardInterrupt:
         pass
     finally:
-        cap.release()
+        if results is not None:
+            results.remove_listener(grabber.wake)
+        grabber.release()
         if show_windows:
-            cv2.destroyAllWindows()
+            try:
+                cv2.destroyWindow(window_name)
+            except cv2.error:
+                pass  # already closed by the user
@@ -0,0 +1,144 @@
+import threading
+import time
+import cv2
+
+# Number of preallocated frame slots (one being written, one published, one being processed)
+RING_SIZE = 3
+
+class FrameGrabber:
+    """
+    Reads frames from a cv2.VideoCapture-like source on its own thread into a
+    small ring of preallocated buffers. acquire() always hands out the newest
+    frame; frames replaced before anyone acquired them are counted as dropped.
+
+    The slot returned by acquire() belongs to the caller (it may draw on it)
+    until the next acquire() call, so the capture thread never overwrites a
+    frame that is still being processed.
+
+    With drop=False the capture thread instead waits until the published frame
+    has been acquired before publishing the next one, so every frame is
+    processed (replaying a clip frame by frame). drop=None drops frames unless
+    the source is `offline` (see frame_sources.FrameSource).
+
+    Each slot is passed back to source.read(slot), so after the first frames
+    capture reuses the same buffers; `buffer_bytes` tallies the sizes of the frames
+    the source returned in a new array instead (first fill of each slot, size changes).
+    """
+
+    def __init__(self, source, ring_size=RING_SIZE, timers=None, drop=None):
+        if ring_size < 3:
+            raise ValueError("FrameGrabber needs at least 3 slots")
+        self.source = source
+        # Optional StageTimers; each read() is recorded as the "capture" stage
+        self.timers = timers
+        self.drop = not getattr(source, "offline", False) if drop is None else drop
+        self._slots = [None] * ring_size
+
+        self._cond = threading.Condition()
+        self._published = None  # slot index of the newest complete frame
+        self._fresh = False     # published frame not yet acquired
+        self._reading = None    # slot the caller currently holds
+        self._running = False
+        self._thread = None
+
+        # Counters
+        self.captured = 0
+        self.processed = 0
+        self.dropped = 0
+        self.buffer_bytes = 0
+
+    def start(self):
+        # Keep the driver's own queue short so frames aren't stale before we see them
+        try:
+            self.source.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        except Exception:
+            pass
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="frame-grabber", daemon=True)
+        self._thread.start()
+        return self
+
+    @property
+    def running(self):
+        return self._running
+
+    def _run(self):
+        try:
+            while self._running and self.source.isOpened():
+                with self._cond:
+                    # Any slot that is neither published nor held by the reader
+                    slot = next(i for i in range(len(self._slots))
+                                if i != self._published and i != self._reading)
+
+                buf = self._slots[slot]
+                t = time.perf_counter()
+                ret, frame = self.source.read(buf) if buf is not None else self.source.read()
+                if not ret:
+                    break
+                if self.timers is not None:
+                    self.timers.record("capture", time.perf_counter() - t)
+                # read() may have allocated a new array (first frame, size change)
+                if frame is not buf:
+                    self._slots[slot] = frame
+                    self.buffer_bytes += frame.nbytes
+
+                with self._cond:
+                    if not self.drop:
+                        # Hold the new frame until the previous one was taken
+                        self._cond.wait_for(lambda: not self._fresh or not self._running)
+                        if not self._running:
+                            break
+                    self.captured += 1
+                    if self._fresh:
+                        self.dropped += 1
+                    self._published = slot
+                    self._fresh = True
+                    self._cond.notify_all()
+        finally:
+            with self._cond:
+                self._running = False
+                self._cond.notify_all()
+
+    def acquire(self, timeout=None, until=None):
+        """
+        Return the newest frame not handed out before, waiting up to `timeout`
+        seconds for one. Returns None on timeout, once capture has ended, or when
+        woken by wake() with the optional `until()` predicate true.
+        """
+        def ready():
+            return self._fresh or not self._running or (until is not None and until())
+
+        with self._cond:
+            if not self._cond.wait_for(ready, timeout):
+                return None
+            if not self._fresh:
+                return None
+            self._reading = self._published
+            self._fresh = False
+            self.processed += 1
+            if not self.drop:
+                self._cond.notify_all()
+            return self._slots[self._reading]
+
+    def wake(self):
+        """Wake a blocked acquire() so it re-checks its `until` predicate."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "captured": self.captured,
+                "processed": self.processed,
+                "dropped": self.dropped,
+                "buffer_bytes": self.buffer_bytes,
+            }
+
+    def release(self):
+        """Stop the capture thread and release the source."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        self.source.release()
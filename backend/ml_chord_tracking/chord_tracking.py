@@ -1,5 +1,19 @@
 ## Main entry point
+##
+## ChordTracker runs one recognizer + camera loop with its own dataset, frame
+## source and prediction state; several can run side by side (e.g. one per
+## player or one per dataset for A/B tests):
+##
+##   tracker = ChordTracker(dataset=Dataset("other.txt"), source=1)
+##   tracker.start()
+##   tracker.get_prediction()
+##   tracker.stop()
+##
+## The module-level functions (start_in_background, get_prediction, subscribe, ...)
+## are thin wrappers around a default tracker using dataset.txt and camera 0.
 
+import itertools
+import json
 import time
 import threading
 import mediapipe as mp
@@ -9,9 +23,17 @@ from importlib.resources import files
 from .parameters import CONFIDENCE_THRESHOLD, TOP_K_DISPLAY, SKELETON_COLOR
 from .parameters import FONT, FONT_SCALE_TOP1, FONT_SCALE_OTHER, THICKNESS_TOP1, THICKNESS_OTHER
 from .parameters import TEXT_X, TEXT_Y, TEXT_VERTICAL_SPACING, DEFAULT_INTERVAL, CHORDS
+from .parameters import NUM_HANDS
 from .camera import run_camera_loop
 from .hand_tracker import compute_features, FINGERS
 from .gui import GestureGUI
+from .session import SessionRecorder
+from .prediction_cache import PredictionCache
+from .capture import FrameGrabber
+from .frame_sources import open_source
+from .timing import StageTimers
+from .results import ResultBuffer
+from .roi import InferenceInput
 
 # Whether or not to show any windows (cv2 windows or the Tk GUI)
 SHOW_WINDOWS = True
@@ -22,25 +44,10 @@ GestureRecognizer = mp.tasks.vision.GestureRecognizer
 GestureRecognizerOptions = mp.tasks.vision.GestureRecognizerOptions
 VisionRunningMode = mp.tasks.vision.RunningMode
 
-latest_result = None
+MODEL_PATH = str(files(__package__).joinpath("gesture_recognizer.task"))
 
-def result_callback(result, output_image, timestamp_ms):
-    global latest_result
-    latest_result = result
-
-
-options = GestureRecognizerOptions(
-    base_options=BaseOptions(model_asset_path=str(files(__package__).joinpath("gesture_recognizer.task"))),
-    running_mode=VisionRunningMode.LIVE_STREAM,
-    result_callback=result_callback,
-)
-
-# helper to expose latest_result to camera module
-def get_latest_result():
-    return latest_result
-
-# ================== Dataset ==================
-dataset = Dataset()
+# Numbers the camera windows of trackers in this process ("Webcam", "Webcam 2", ...)
+_window_numbers = itertools.count(1)
 
 # Minimal headless GUI-like object for logging state when no GUI windows are shown
 class HeadlessGUI:
@@ -53,114 +60,459 @@ class HeadlessGUI:
         """Return the label used for logging (same contract as GestureGUI.get_active_label)."""
         return self.selected_chord
 
-# on_predictions will be called by camera module each frame with list[(label, conf)]
-# (REPLACED) on_predictions now updates a global latest_preds so external importers can read the current prediction.
-latest_preds = None  # stores the most recent list[(label, conf)]
+class ChordTracker:
+    """
+    One chord tracker: a MediaPipe recognizer, a camera loop on a background
+    thread, the dataset it ranks against / logs into, and its prediction state.
+
+    dataset: Dataset to use (default: a new Dataset() over dataset.txt). Trackers
+             may share one Dataset as long as at most one of them auto-logs.
+    source:  default frame source for start() (see frame_sources.open_source).
+    model_path: gesture recognizer model (.task).
+    on_frame: optional callable(frame) given every captured BGR frame (see run_camera_loop).
+    window_name: title of the cv2 window shown with show_windows (default: "Webcam"
+                 for the first tracker, then "Webcam 2", ...), so trackers don't share one.
+    """
+
+    def __init__(self, dataset=None, source=0, model_path=MODEL_PATH, on_frame=None, window_name=None):
+        self.dataset = dataset if dataset is not None else Dataset()
+        self.source = source
+        self.model_path = model_path
+        self.on_frame = on_frame
+        if window_name is None:
+            number = next(_window_numbers)
+            window_name = "Webcam" if number == 1 else f"Webcam {number}"
+        self.window_name = window_name
+
+        self.latest_result = None
+
+        # Results paired with the frames (timestamps) they were computed from
+        self.results = ResultBuffer()
+
+        # Crops/downscales frames before recognition; tracks the hands between frames
+        self.inference_input = InferenceInput()
+
+        # Skips the kNN ranking while the hand holds still (invalidated by dataset.log)
+        self.prediction_cache = PredictionCache()
+
+        # Per-stage timings of the capture / recognition loop (cheap enough to leave on)
+        self.stage_timers = StageTimers()
+
+        # Latest top-K list[(label, conf)] (fretting hand) and per-hand predictions.
+        # Consumers can block on / subscribe to new predictions instead of polling get_prediction()
+        self.latest_preds = None
+        self.latest_hand_preds = []
+        self._preds_cond = threading.Condition()
+        self._preds_seq = 0  # incremented for every new list of predictions
+        self._subscribers = []
+
+        # Bytes of the images handed to mp.Image (it copies each one into its own frame)
+        self._submitted_bytes = 0
+
+        self._started = False
+        self._stop_event = None
+        self._thread = None
+        self._grabber = None
+
+    # ================== Recognizer ==================
+    def result_callback(self, result, output_image, timestamp_ms):
+        self.latest_result = result
+        region = self.results.put(result, timestamp_ms)
+        if region is not None:
+            self.inference_input.update(result.hand_landmarks, region)
+
+    def recognizer_options(self):
+        """GestureRecognizerOptions that deliver results to this tracker."""
+        return GestureRecognizerOptions(
+            base_options=BaseOptions(model_asset_path=self.model_path),
+            running_mode=VisionRunningMode.LIVE_STREAM,
+            num_hands=NUM_HANDS,
+            result_callback=self.result_callback,
+        )
+
+    # helper to expose latest_result to camera module
+    def get_latest_result(self):
+        return self.latest_result
+
+    # ================== Statistics ==================
+    def get_latency_stats(self):
+        """Return submit-to-result latency statistics (ms percentiles) and frame/result counters."""
+        return self.results.latency_stats()
+
+    def get_cache_stats(self):
+        """Return hit/miss counters of the frame-to-frame prediction cache."""
+        return self.prediction_cache.stats()
+
+    def get_capture_stats(self):
+        """Return captured / processed / dropped frame counters of the running capture thread."""
+        if self._grabber is None:
+            return {"captured": 0, "processed": 0, "dropped": 0, "buffer_bytes": 0}
+        return self._grabber.stats()
+
+    def get_memory_stats(self):
+        """
+        Return byte tallies kept at the known allocation sites of the frame path:
+        capture buffers the source had to allocate, recognizer input buffers (crop /
+        downscale / RGB), the per-frame mp.Image copy, and their sum averaged over
+        processed frames (counted_bytes_per_frame). These are counters, not a
+        measurement: MediaPipe internals, drawing and Python objects aren't included.
+        """
+        capture = self.get_capture_stats()
+        inference = self.inference_input.buffer_bytes
+        frames = capture["processed"]
+        total = capture["buffer_bytes"] + inference + self._submitted_bytes
+        return {
+            "capture_buffer_bytes": capture["buffer_bytes"],
+            "inference_buffer_bytes": inference,
+            "recognizer_copy_bytes": self._submitted_bytes,
+            "frames": frames,
+            "counted_bytes_per_frame": total / frames if frames else 0.0,
+        }
+
+    def get_stats(self):
+        """
+        Return a snapshot of tracker statistics:
+          stages     - per stage (capture, convert, submit, features, knn, draw, loop):
+                       count, mean/p50/p95/p99/max in ms and effective fps
+          capture    - captured / processed / dropped frame counters
+          recognizer - submit-to-result latency and result counters
+          cache      - prediction cache hits / misses
+          memory     - byte tallies of the frame path's buffers (see get_memory_stats)
+        """
+        return {
+            "stages": self.stage_timers.stats(),
+            "capture": self.get_capture_stats(),
+            "recognizer": self.get_latency_stats(),
+            "cache": self.get_cache_stats(),
+            "memory": self.get_memory_stats(),
+        }
+
+    def dump_stats(self, path):
+        """Write get_stats() to `path` as JSON."""
+        with open(path, "w") as f:
+            json.dump(self.get_stats(), f, indent=2)
+
+    # ================== Predictions ==================
+    def on_hand_predictions(self, hands):
+        with self._preds_cond:
+            self.latest_hand_preds = hands
+
+    def get_hand_predictions(self):
+        """
+        Return the predictions for every hand in the latest frame, as a list of dicts
+        {"hand": "Left"/"Right", "score": handedness score, "fretting": bool,
+        "preds": list[(label, conf)]}. get_prediction() reports the fretting hand.
+        """
+        with self._preds_cond:
+            return list(self.latest_hand_preds)
+
+    # on_predictions is called by the camera module each frame with list[(label, conf)]
+    def on_predictions(self, preds):
+        with self._preds_cond:
+            self.latest_preds = preds
+            self._preds_seq += 1
+            self._preds_cond.notify_all()
+            subscribers = list(self._subscribers)
+
+        for callback in subscribers:
+            try:
+                callback(preds)
+            except Exception as e:
+                print(f"Prediction subscriber failed: {e}")
+
+    def wait_for_prediction(self, timeout=None):
+        """
+        Block until the camera loop publishes a new top-K list and return it
+        (list[(label, conf)], empty when no chord is recognized).
+        Returns None if nothing new arrives within `timeout` seconds.
+        """
+        with self._preds_cond:
+            seq = self._preds_seq
+            if not self._preds_cond.wait_for(lambda: self._preds_seq != seq, timeout):
+                return None
+            return self.latest_preds
+
+    def subscribe(self, callback):
+        """
+        Call callback(preds) with every new top-K list, on the camera thread, as soon
+        as it is computed (keep it short). Returns a function that unsubscribes.
+        """
+        with self._preds_cond:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._preds_cond:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    def iter_predictions(self, timeout=None):
+        """
+        Yield every new top-K list as it is published. Stops when nothing arrives
+        within `timeout` seconds (never, if timeout is None). Lists published while
+        the consumer is busy are skipped; the newest one is always delivered.
+        """
+        with self._preds_cond:
+            seq = self._preds_seq
+        while True:
+            with self._preds_cond:
+                if not self._preds_cond.wait_for(lambda: self._preds_seq != seq, timeout):
+                    return
+                seq = self._preds_seq
+                preds = self.latest_preds
+            yield preds
+
+    def get_prediction(self):
+        """
+        Return the top predicted label string, or None if no prediction available.
+        """
+        preds = self.latest_preds
+        if not preds:
+            return None
+        try:
+            top = preds[0]
+            return top[0] if top else None
+        except Exception:
+            return None
+
+    # ================== Background worker ==================
+    @property
+    def running(self):
+        return self._started
+
+    def _background_worker(self, show_windows, record_path=None, source=0, stats_path=None):
+        # optional landmark recording, saved when the worker exits
+        recorder = SessionRecorder(record_path) if record_path else None
+        try:
+            self._run_worker(show_windows, recorder, source)
+        finally:
+            if recorder is not None:
+                recorder.save()
+            if stats_path:
+                self.dump_stats(stats_path)
+
+    def _run_worker(self, show_windows, recorder, source):
+        # create recognizer and run camera loop in this worker thread (recognizer lives in this scope)
+        with GestureRecognizer.create_from_options(self.recognizer_options()) as recognizer:
+            # frames are captured on their own thread; the loop always takes the newest
+            self._grabber = FrameGrabber(open_source(source), timers=self.stage_timers).start()
+
+            def submit_frame(frame):
+                # frame is the captured BGR buffer; the recognizer gets a cropped/downscaled
+                # RGB image (reused buffer, copied by mp.Image) and the timestamp pairs the
+                # result with the crop region it came from
+                t = time.perf_counter()
+                image, region = self.inference_input.prepare(frame)
+                t_convert = time.perf_counter()
+                self.stage_timers.record("convert", t_convert - t, t_convert)
+                mp_image = mp.Image(mp.ImageFormat.SRGB, image)
+                self._submitted_bytes += image.nbytes
+                recognizer.recognize_async(mp_image, self.results.submit(region))
+                self.stage_timers.record("submit", time.perf_counter() - t_convert)
+
+            loop_kwargs = dict(
+                submit_frame=submit_frame,
+                get_latest_result=self.get_latest_result,
+                dataset=self.dataset,
+                on_predictions=self.on_predictions,
+                on_hand_predictions=self.on_hand_predictions,
+                show_windows=show_windows,
+                window_name=self.window_name,
+                stop_event=self._stop_event,
+                recorder=recorder,
+                cache=self.prediction_cache,
+                grabber=self._grabber,
+                results=self.results,
+                timers=self.stage_timers,
+                on_frame=self.on_frame,
+            )
+
+            if show_windows:
+                # If caller asked for GUI, we still create a GestureGUI here,
+                # but note that Tkinter usually needs to run on the main thread.
+                # For background usage prefer show_windows=False.
+                gui = GestureGUI(start_callback=None, stop_callback=None)
+                gui.root.protocol("WM_DELETE_WINDOW", lambda: (self._stop_event.set(), gui.root.destroy()))
+
+                # run camera loop in another background thread so the worker can run gui.run()
+                camera_thread = threading.Thread(
+                    target=run_camera_loop, kwargs=dict(loop_kwargs, gui=gui), daemon=True,
+                )
+                camera_thread.start()
+                try:
+                    gui.run()
+                finally:
+                    self._stop_event.set()
+                    camera_thread.join(timeout=2)
+            else:
+                try:
+                    run_camera_loop(gui=HeadlessGUI(), **loop_kwargs)
+                except KeyboardInterrupt:
+                    pass
+
+    def start(self, show_windows=False, record_path=None, source=None, stats_path=None):
+        """
+        Start the recognizer and camera loop in a background thread.
+        By default runs headless (show_windows=False). Returns immediately.
+        `source` selects where frames come from (default: the tracker's source): a
+        camera index, a video file, a directory of images, "synthetic", or a
+        FrameSource instance (see frame_sources.py, e.g. VideoFileSource(path,
+        realtime=False) for benchmarks).
+        If stats_path is given, get_stats() is written there as JSON when the worker stops.
+        If record_path is given, the hand landmarks seen each frame are saved there
+        (.npz, see session.py) when the worker stops; replay with `python -m
+        backend.ml_chord_tracking.replay <path>`.
+        Call stop() to stop.
+        """
+        if self._started:
+            return
+        if source is None:
+            source = self.source
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self._background_worker, args=(show_windows, record_path, source, stats_path), daemon=True,
+        )
+        self._thread.start()
+        self._started = True
+
+    def run(self, show_windows=False, record_path=None, source=None, stats_path=None, stop_event=None):
+        """
+        Run the tracker on the calling thread (same arguments as start()) until
+        capture ends or `stop_event` is set. stop_event may be any event object
+        with is_set()/set(), e.g. a multiprocessing.Event owned by another process.
+        """
+        self._stop_event = stop_event if stop_event is not None else threading.Event()
+        try:
+            self._background_worker(show_windows, record_path, self.source if source is None else source, stats_path)
+        finally:
+            self.dataset.close()
+
+    def stop(self, timeout=2.0):
+        """
+        Signal the background worker to stop and wait up to `timeout` seconds.
+        """
+        if not self._started:
+            return
+        self._stop_event.set()
+        if self._grabber is not None:
+            self._grabber.wake()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        # Make sure every auto-logged sample reaches the dataset log
+        self.dataset.close()
+        self._started = False
+        self._thread = None
+        self._stop_event = None
+
+# ================== Module-level API (default tracker) ==================
+_default_tracker = None
+_default_lock = threading.Lock()
+
+def default_tracker():
+    """Return the tracker behind the module-level functions (created on first use)."""
+    global _default_tracker
+    with _default_lock:
+        if _default_tracker is None:
+            _default_tracker = ChordTracker()
+        return _default_tracker
+
+def set_default_tracker(tracker):
+    """
+    Make the module-level functions use `tracker`, e.g. a ProcessChordTracker
+    (process_tracker.py) to keep recognition out of the caller's process.
+    Call it before subscribe() / start_in_background().
+    """
+    global _default_tracker
+    with _default_lock:
+        if _default_tracker is not None and _default_tracker.running:
+            raise RuntimeError("Stop the current default tracker before replacing it")
+        _default_tracker = tracker
+
+# Attributes of the old module-level state, now read from the default tracker
+_TRACKER_ATTRIBUTES = (
+    "dataset", "results", "inference_input", "prediction_cache", "stage_timers",
+    "latest_result", "latest_preds", "latest_hand_preds",
+)
+
+def __getattr__(name):
+    if name in _TRACKER_ATTRIBUTES:
+        tracker = default_tracker()
+        try:
+            return getattr(tracker, name)
+        except AttributeError:
+            # e.g. a ProcessChordTracker: the recognizer state lives in its child process
+            raise AttributeError(f"{name!r} is not available from a {type(tracker).__name__}") from None
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def get_latest_result():
+    return default_tracker().get_latest_result()
+
+def get_latency_stats():
+    """Return submit-to-result latency statistics (ms percentiles) and frame/result counters."""
+    return default_tracker().get_latency_stats()
+
+def get_cache_stats():
+    """Return hit/miss counters of the frame-to-frame prediction cache."""
+    return default_tracker().get_cache_stats()
+
+def get_capture_stats():
+    """Return captured / processed / dropped frame counters of the running capture thread."""
+    return default_tracker().get_capture_stats()
+
+def get_memory_stats():
+    """Return byte tallies of the frame path's buffers (see ChordTracker.get_memory_stats)."""
+    return default_tracker().get_memory_stats()
+
+def get_stats():
+    """Return a snapshot of tracker statistics (see ChordTracker.get_stats)."""
+    return default_tracker().get_stats()
+
+def dump_stats(path):
+    """Write get_stats() to `path` as JSON."""
+    default_tracker().dump_stats(path)
+
+def on_hand_predictions(hands):
+    default_tracker().on_hand_predictions(hands)
+
+def get_hand_predictions():
+    """Return the per-hand predictions of the latest frame (see ChordTracker.get_hand_predictions)."""
+    return default_tracker().get_hand_predictions()
 
 def on_predictions(preds):
-    global latest_preds
-    latest_preds = preds
-    if not preds:
-        # print("Predictions: (none)")
-        pass
-    else:
-        s = ", ".join(f"{label} - {conf*100:.0f}%" for label, conf in preds)
-        # print(f"Predictions: {s}")
-
-# New API: start/stop background processing and a simple getter for the top prediction.
-_background_started = False
-_stop_event = None
-_camera_thread = None
+    default_tracker().on_predictions(preds)
+
+def wait_for_prediction(timeout=None):
+    """Block until a new top-K list is published and return it (None on timeout)."""
+    return default_tracker().wait_for_prediction(timeout)
+
+def subscribe(callback):
+    """Call callback(preds) with every new top-K list. Returns a function that unsubscribes."""
+    return default_tracker().subscribe(callback)
+
+def iter_predictions(timeout=None):
+    """Yield every new top-K list as it is published (see ChordTracker.iter_predictions)."""
+    return default_tracker().iter_predictions(timeout)
 
 def get_prediction():
     """
     Return the top predicted label string, or None if no prediction available.
     """
-    global latest_preds
-    if not latest_preds:
-        return None
-    try:
-        top = latest_preds[0]
-        return top[0] if top else None
-    except Exception:
-        return None
-
-def _background_worker(show_windows):
-    # create recognizer and run camera loop in this worker thread (recognizer lives in this scope)
-    with GestureRecognizer.create_from_options(options) as recognizer:
-
-        def submit_frame(rgb):
-            # rgb is a numpy array in RGB order
-            mp_image = mp.Image(mp.ImageFormat.SRGB, rgb)
-            recognizer.recognize_async(mp_image, int(time.time() * 1000))
-
-        if show_windows:
-            # If caller asked for GUI, we still create a GestureGUI here,
-            # but note that Tkinter usually needs to run on the main thread.
-            # For background usage prefer show_windows=False.
-            gui = GestureGUI(start_callback=None, stop_callback=None)
-            gui.root.protocol("WM_DELETE_WINDOW", lambda: (_stop_event.set(), gui.root.destroy()))
-
-            # run camera loop in another background thread so the worker can run gui.run()
-            camera_thread = threading.Thread(
-                target=run_camera_loop,
-                kwargs=dict(
-                    submit_frame=submit_frame,
-                    get_latest_result=get_latest_result,
-                    dataset=dataset,
-                    gui=gui,
-                    on_predictions=on_predictions,
-                    show_windows=show_windows,
-                    stop_event=_stop_event,
-                ),
-                daemon=True,
-            )
-            camera_thread.start()
-            try:
-                gui.run()
-            finally:
-                _stop_event.set()
-                camera_thread.join(timeout=2)
-        else:
-            gui = HeadlessGUI()
-            try:
-                run_camera_loop(
-                    submit_frame=submit_frame,
-                    get_latest_result=get_latest_result,
-                    dataset=dataset,
-                    gui=gui,
-                    on_predictions=on_predictions,
-                    show_windows=show_windows,
-                    stop_event=_stop_event,
-                )
-            except KeyboardInterrupt:
-                pass
+    return default_tracker().get_prediction()
 
-def start_in_background(show_windows=False):
+def start_in_background(show_windows=False, record_path=None, source=0, stats_path=None):
     """
-    Start the recognizer and camera loop in a background thread.
-    By default runs headless (show_windows=False). Returns immediately.
+    Start the default tracker in a background thread (see ChordTracker.start).
     Call stop_background() to stop.
     """
-    global _background_started, _stop_event, _camera_thread
-    if _background_started:
-        return
-    _stop_event = threading.Event()
-    _camera_thread = threading.Thread(target=_background_worker, args=(show_windows,), daemon=True)
-    _camera_thread.start()
-    _background_started = True
+    default_tracker().start(show_windows, record_path, source, stats_path)
 
 def stop_background(timeout=2.0):
     """
     Signal the background worker to stop and wait up to `timeout` seconds.
+    Does nothing if no default tracker was ever created or set.
     """
-    global _background_started, _stop_event, _camera_thread
-    if not _background_started:
-        return
-    _stop_event.set()
-    if _camera_thread is not None:
-        _camera_thread.join(timeout=timeout)
-    _background_started = False
-    _camera_thread = None
-    _stop_event = None
-
+    with _default_lock:
+        tracker = _default_tracker
+    if tracker is not None:
+        tracker.stop(timeout)
@@ -0,0 +1,212 @@
+## Dataset condensation (prototype reduction) for the kNN chord classifier
+##
+##   python -m backend.ml_chord_tracking.condense --method dedupe --out reduced.txt
+##   python -m backend.ml_chord_tracking.condense --compare
+##
+## Auto-logging adds many near-identical samples per chord; every one of them is
+## scanned per frame. These methods shrink the dataset while keeping accuracy:
+##   dedupe  - drop samples within eps of an earlier kept sample of the same label
+##   enn     - Wilson's edited NN: drop samples their K nearest neighbours misclassify (noise)
+##   cnn     - Hart's condensed NN: keep only samples needed for 1-NN to classify the rest
+##   kmeans  - replace each label's samples by k-means centroids
+##   enn+cnn - edit first, then condense
+
+import argparse
+import os
+import numpy as np
+from .dataset import Dataset, LOG_FILE, nearest_blocks, majority_vote
+from .knn_index import KDTreeIndex
+from .evaluate import assign_folds, predict_from_neighbors
+from .parameters import K, DIST_THRESHOLD
+
+METHODS = ("dedupe", "enn", "cnn", "kmeans", "enn+cnn")
+
+# Radius for near-duplicate removal (feature units). On dataset.txt a sample's
+# nearest same-label neighbour is 0.034 / 0.051 / 0.095 away at the 10th / 25th /
+# 50th percentile; 5-fold accuracy stays flat up to eps 0.08 (75% of samples kept)
+# and drops from 0.1, so 0.06 (82% kept) leaves a margin
+DEDUPE_EPS = 0.06
+
+# Prototypes per label for k-means condensation
+KMEANS_PER_LABEL = 32
+KMEANS_ITERATIONS = 20
+
+def dedupe(X, y, eps=DEDUPE_EPS):
+    """
+    Indices of samples kept when each sample (in order) is dropped if an already
+    kept sample of the same label lies within distance eps.
+    """
+    X = np.asarray(X, dtype=np.float32)
+    y = np.asarray(y)
+    keep = []
+    for label in np.unique(y):
+        rows = np.nonzero(y == label)[0]
+        # Kept samples of this label; the index sees each as a pending append
+        kept = np.empty((len(rows), X.shape[1]), dtype=np.float32)
+        n_kept = 0
+        index = KDTreeIndex()
+        for i in rows:
+            if n_kept:
+                index.update(kept[:n_kept])
+                if len(index.query_radius(X[i], eps)[0]):
+                    continue
+            kept[n_kept] = X[i]
+            n_kept += 1
+            keep.append(i)
+    return np.sort(np.array(keep, dtype=np.intp))
+
+def edited_nn(X, y, k=K):
+    """Indices of samples whose K nearest other samples vote for their own label."""
+    y = np.asarray(y)
+    n = len(X)
+    if n <= k:
+        return np.arange(n)
+    keep = np.zeros(n, dtype=bool)
+    self_group = np.arange(n)
+    for start, _, idx in nearest_blocks(X, X, k, query_groups=self_group, sample_groups=self_group):
+        stop = start + len(idx)
+        keep[start:stop] = majority_vote(y[idx]) == y[start:stop]
+    return np.nonzero(keep)[0]
+
+def condensed_nn(X, y, max_passes=10):
+    """
+    Hart's condensed nearest neighbour: indices of a subset such that 1-NN over
+    it classifies every sample of X correctly (or max_passes is reached).
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y)
+    _, first = np.unique(y, return_index=True)
+    store = list(first)
+    in_store = np.zeros(len(X), dtype=bool)
+    in_store[store] = True
+
+    for _ in range(max_passes):
+        added = False
+        for i in np.nonzero(~in_store)[0]:
+            S = X[store]
+            nearest = store[int(np.argmin(((S - X[i]) ** 2).sum(axis=1)))]
+            if y[nearest] != y[i]:
+                store.append(i)
+                in_store[i] = True
+                added = True
+        if not added:
+            break
+    return np.sort(np.array(store))
+
+def kmeans_prototypes(X, y, per_label=KMEANS_PER_LABEL, iterations=KMEANS_ITERATIONS, seed=0):
+    """Replace each label's samples by up to `per_label` k-means centroids. Returns (X, y)."""
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y)
+    rng = np.random.default_rng(seed)
+    out_X, out_y = [], []
+
+    for label in np.unique(y):
+        P = X[y == label]
+        if len(P) <= per_label:
+            out_X.append(P)
+            out_y.append(np.full(len(P), label))
+            continue
+
+        centers = P[rng.choice(len(P), per_label, replace=False)]
+        for _ in range(iterations):
+            d2 = ((P[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+            assign = np.argmin(d2, axis=1)
+            sums = np.zeros_like(centers)
+            np.add.at(sums, assign, P)
+            counts = np.bincount(assign, minlength=per_label)
+            # Empty clusters keep their previous center
+            filled = counts > 0
+            centers[filled] = sums[filled] / counts[filled, None]
+
+        out_X.append(centers)
+        out_y.append(np.full(per_label, label))
+
+    return np.concatenate(out_X), np.concatenate(out_y)
+
+def reduce(X, y, method, eps=DEDUPE_EPS, per_label=KMEANS_PER_LABEL):
+    """Apply a condensation method to (X, y label ids). Returns the reduced (X, y)."""
+    X = np.asarray(X)
+    y = np.asarray(y)
+    if method == "dedupe":
+        keep = dedupe(X, y, eps)
+    elif method == "enn":
+        keep = edited_nn(X, y)
+    elif method == "cnn":
+        keep = condensed_nn(X, y)
+    elif method == "enn+cnn":
+        edited = edited_nn(X, y)
+        keep = edited[condensed_nn(X[edited], y[edited])]
+    elif method == "kmeans":
+        return kmeans_prototypes(X, y, per_label)
+    else:
+        raise ValueError(f"Unknown condensation method '{method}' (expected one of {METHODS})")
+    return X[keep], y[keep]
+
+def condense_dataset(dataset, method, **kwargs):
+    """Return a new in-memory Dataset holding the reduced samples of `dataset`."""
+    X, y = reduce(dataset.X, dataset.y_ids, method, **kwargs)
+    reduced = Dataset(log_file=os.devnull, use_binary=False)
+    reduced._extend([dataset.labels[i] for i in y], X)
+    return reduced
+
+def cross_validate(dataset, method, folds=5, seed=0, **kwargs):
+    """
+    Accuracy of predict() when the training folds are condensed with `method`
+    (None = no reduction). Returns (accuracy, mean fraction of training samples kept).
+    """
+    X = np.asarray(dataset.X)
+    y = np.asarray(dataset.y_ids)
+    fold_ids = assign_folds(len(X), folds, seed)
+    correct = 0
+    kept = []
+
+    for fold in np.unique(fold_ids):
+        test = fold_ids == fold
+        train_X, train_y = X[~test], y[~test]
+        if method is not None:
+            small_X, small_y = reduce(train_X, train_y, method, **kwargs)
+        else:
+            small_X, small_y = train_X, train_y
+        kept.append(len(small_X) / max(1, len(train_X)))
+
+        if len(small_X) == 0:
+            continue
+        n_neighbors = min(K, len(small_X))
+        for start, d, idx in nearest_blocks(X[test], small_X, n_neighbors):
+            pred = predict_from_neighbors(d, small_y[idx], n_neighbors, DIST_THRESHOLD)
+            correct += int((pred == y[test][start:start + len(pred)]).sum())
+
+    return correct / len(X), float(np.mean(kept))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shrink a chord dataset by prototype reduction.")
+    parser.add_argument("--dataset", default=LOG_FILE)
+    parser.add_argument("--method", choices=METHODS, default="dedupe")
+    parser.add_argument("--out", help="write the reduced dataset here (text log format)")
+    parser.add_argument("--eps", type=float, default=DEDUPE_EPS, help="duplicate radius for dedupe")
+    parser.add_argument("--per-label", type=int, default=KMEANS_PER_LABEL, help="prototypes per label for kmeans")
+    parser.add_argument("--folds", type=int, default=5, help="folds for the accuracy report")
+    parser.add_argument("--compare", action="store_true", help="report accuracy vs size for every method")
+    args = parser.parse_args(argv)
+
+    dataset = Dataset(args.dataset)
+    if len(dataset) < 2:
+        print(f"Dataset '{args.dataset}' has too few samples ({len(dataset)})")
+        return
+    kwargs = {"eps": args.eps, "per_label": args.per_label}
+
+    print(f"Dataset: {len(dataset)} samples ({args.folds}-fold accuracy of predict())")
+    print("  method     kept   accuracy")
+    accuracy, _ = cross_validate(dataset, None, args.folds)
+    print(f"  {'none':8s} {100.0:5.1f}%   {accuracy * 100:6.1f}%")
+    for method in (METHODS if args.compare else (args.method,)):
+        accuracy, kept = cross_validate(dataset, method, args.folds, **kwargs)
+        print(f"  {method:8s} {kept * 100:5.1f}%   {accuracy * 100:6.1f}%")
+
+    if args.out:
+        reduced = condense_dataset(dataset, args.method, **kwargs)
+        reduced.save_text(args.out)
+        print(f"Wrote {len(reduced)} of {len(dataset)} samples ({args.method}) to '{args.out}'")
+
+if __name__ == "__main__":
+    main()
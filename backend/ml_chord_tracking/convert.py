@@ -0,0 +1,47 @@
+## Convert between the text dataset log and the binary snapshot format
+##
+##   python -m backend.ml_chord_tracking.convert to-binary [dataset.txt] [base]
+##   python -m backend.ml_chord_tracking.convert to-text base out.txt
+
+import argparse
+import os
+from .dataset import Dataset, LOG_FILE, binary_base
+
+def to_binary(txt_path, base=None):
+    """Parse a text log and write it as a binary snapshot. Returns the base path."""
+    if base is None:
+        base = binary_base(txt_path)
+
+    dataset = Dataset(log_file=txt_path, use_binary=False)
+    dataset.save_binary(base, source_bytes=os.path.getsize(txt_path))
+    return base
+
+def to_text(base, txt_path):
+    """Read a binary snapshot and write it in the text log format."""
+    dataset = Dataset(log_file=os.devnull, use_binary=False)
+    if not dataset.load_binary(base):
+        raise FileNotFoundError(f"No binary dataset at '{base}'")
+    dataset.save_text(txt_path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert chord datasets between text and binary formats.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("to-binary", help="text log -> binary snapshot")
+    p.add_argument("txt", nargs="?", default=LOG_FILE)
+    p.add_argument("base", nargs="?", default=None, help="output base path (default: txt path without extension)")
+
+    p = sub.add_parser("to-text", help="binary snapshot -> text log")
+    p.add_argument("base")
+    p.add_argument("txt")
+
+    args = parser.parse_args(argv)
+    if args.command == "to-binary":
+        base = to_binary(args.txt, args.base)
+        print(f"Wrote binary dataset '{base}'")
+    else:
+        to_text(args.base, args.txt)
+        print(f"Wrote text dataset '{args.txt}'")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,27 @@
 import os
+import json
+import hashlib
 from importlib.resources import files
 import numpy as np
-from .parameters import K, DIST_THRESHOLD
+from .parameters import K, DIST_THRESHOLD, CONFIDENCE_THRESHOLD, TOP_K_DISPLAY
+from .knn_index import KDTreeIndex
+from .log_writer import LogWriter
 
 LOG_FILE = str(files(__package__).joinpath("dataset.txt"))
 
+# Binary snapshot of a dataset: <base>.features.npy (float32, n x 8),
+# <base>.labels.npy (int32 label ids) and <base>.meta.json (label names,
+# row count, how many bytes of the text log the snapshot covers and the log's
+# mtime / SHA-256 of the end of those bytes at the time)
+BINARY_FORMAT_VERSION = 1
+FEATURES_SUFFIX = ".features.npy"
+LABELS_SUFFIX = ".labels.npy"
+META_SUFFIX = ".meta.json"
+
+# Bytes at the end of the covered log that are hashed to check a snapshot (so
+# opening stays constant time however long the log gets)
+SNAPSHOT_HASH_BYTES = 1 << 16
+
 # Comment header explaining dataset format
 COMMENT_HEADER = (
     "# label,"
@@ -14,20 +31,162 @@ COMMENT_HEADER = (
     "pinky_bend,pinky_tip_dist\n"
 )
 
+# Number of features per sample (bend + tip distance for 4 fingers)
+NUM_FEATURES = 8
+
+# Starting number of rows in the feature store (grows by doubling)
+INITIAL_CAPACITY = 256
+
+# Max entries in one block of the query x sample distance matrix used by
+# predict_batch (4M float64 = 32 MB); the block height adapts to the dataset size
+BLOCK_ELEMENTS = 1 << 22
+
 class Dataset:
-    def __init__(self, log_file=LOG_FILE):
+    def __init__(self, log_file=LOG_FILE, use_binary=True, buffered=True):
         self.log_file = log_file
-        self.X = []
-        self.y = []
+        self.use_binary = use_binary
+
+        # Write-behind appender used by log() when buffered (created on first log)
+        self.buffered = buffered
+        self._writer = None
+
+        # Integer label encoding: labels[id] -> label string, label_ids[label] -> id
+        self.labels = []
+        self.label_ids = {}
+
+        # Contiguous feature store; only the first _n rows are valid
+        self._X = np.empty((INITIAL_CAPACITY, NUM_FEATURES), dtype=np.float32)
+        self._y = np.empty(INITIAL_CAPACITY, dtype=np.int32)
+        self._n = 0
+
+        # Label string per sample, built on first access to dataset.y
+        self._y_names = None
+
+        # Cached read-only views, reset whenever a sample is added
+        self._X_view = None
+        self._y_view = None
+
+        # Bumped whenever samples change, so caches of query results can tell they are stale
+        self.version = 0
+
+        # Spatial index over X; new samples are picked up lazily at query time
+        self.index = KDTreeIndex()
+
         self.load()
 
+    def __len__(self):
+        return self._n
+
+    @property
+    def X(self):
+        """Read-only (n, NUM_FEATURES) float32 view of the stored features."""
+        if self._X_view is None:
+            view = self._X[:self._n]
+            view.flags.writeable = False
+            self._X_view = view
+        return self._X_view
+
+    @property
+    def y(self):
+        """Label string per sample (list, kept for callers that index dataset.y)."""
+        if self._y_names is None:
+            self._y_names = [self.labels[i] for i in self.y_ids]
+        return self._y_names
+
+    @property
+    def y_ids(self):
+        """Read-only (n,) int32 view of the integer label ids."""
+        if self._y_view is None:
+            view = self._y[:self._n]
+            view.flags.writeable = False
+            self._y_view = view
+        return self._y_view
+
+    def label_id(self, label):
+        """Return the integer id for `label`, registering it if new."""
+        label_id = self.label_ids.get(label)
+        if label_id is None:
+            label_id = len(self.labels)
+            self.labels.append(label)
+            self.label_ids[label] = label_id
+        return label_id
+
+    def _reserve(self, n):
+        """Make room for at least `n` rows, doubling the capacity as needed."""
+        capacity = len(self._X)
+        if n <= capacity:
+            return
+
+        while capacity < n:
+            capacity *= 2
+
+        X = np.empty((capacity, NUM_FEATURES), dtype=np.float32)
+        X[:self._n] = self._X[:self._n]
+        y = np.empty(capacity, dtype=np.int32)
+        y[:self._n] = self._y[:self._n]
+        self._X = X
+        self._y = y
+
+    def _append(self, label, features):
+        """Add one sample to the in-memory store (amortized O(1))."""
+        self._reserve(self._n + 1)
+        self._X[self._n] = features
+        self._y[self._n] = self.label_id(label)
+        self._n += 1
+        if self._y_names is not None:
+            self._y_names.append(label)
+        self._X_view = None
+        self._y_view = None
+        self.version += 1
+
+    def _extend(self, labels, features):
+        """Add many samples at once. `features` is an (m, NUM_FEATURES) array-like."""
+        features = np.asarray(features, dtype=np.float32).reshape(-1, NUM_FEATURES)
+        m = len(features)
+        if m == 0:
+            return
+
+        self._reserve(self._n + m)
+        self._X[self._n:self._n + m] = features
+        self._y[self._n:self._n + m] = [self.label_id(label) for label in labels]
+        self._n += m
+        if self._y_names is not None:
+            self._y_names.extend(labels)
+        self._X_view = None
+        self._y_view = None
+        self.version += 1
+
     def load(self):
-        """Load dataset from file, ignoring comment lines."""
+        """
+        Load dataset, preferring the binary snapshot next to the text log.
+        The snapshot is memory-mapped; any text appended after it was written
+        is parsed on top. Falls back to parsing the whole text log.
+        """
+        if self.use_binary:
+            base = binary_base(self.log_file)
+            meta = read_binary_meta(base)
+            log_size = os.path.getsize(self.log_file) if os.path.exists(self.log_file) else 0
+
+            # The snapshot covers the first source_bytes of the log; if the log
+            # was rewritten since, the snapshot cannot be trusted
+            if meta is not None and snapshot_matches_log(meta, self.log_file) and self.load_binary(base):
+                if log_size > meta["source_bytes"]:
+                    self._load_text(meta["source_bytes"])
+                return
+
+        self._load_text()
+
+    def _load_text(self, offset=0):
+        """Parse the text log from byte `offset`, ignoring comment lines."""
         if not os.path.exists(self.log_file):
             return
 
-        with open(self.log_file, "r") as f:
+        labels = []
+        features = []
+        with open(self.log_file, "rb") as f:
+            f.seek(offset)
             for line in f:
+                line = line.decode("utf-8")
                 if line.startswith("#"):
                     continue
 
@@ -35,40 +194,332 @@ class Dataset:
                 if len(parts) != 9:
                     continue
 
-                label = parts[0]
-                features = list(map(float, parts[1:]))
-                self.X.append(features)
-                self.y.append(label)
+                labels.append(parts[0])
+                features.append(list(map(float, parts[1:])))
+
+        self._extend(labels, features)
+
+    def load_binary(self, base, mmap=True):
+        """
+        Load a binary snapshot written by save_binary(). With mmap=True the arrays
+        are mapped read-only, so opening is constant time and processes share pages;
+        the first log() copies them into a private growable buffer.
+        Returns False (leaving the dataset untouched) if the snapshot is missing or invalid.
+        """
+        meta = read_binary_meta(base)
+        if meta is None:
+            return False
+
+        rows = meta["rows"]
+        if rows > 0:
+            mode = "r" if mmap else None
+            X = np.load(base + FEATURES_SUFFIX, mmap_mode=mode)
+            y = np.load(base + LABELS_SUFFIX, mmap_mode=mode)
+            if X.shape != (rows, NUM_FEATURES) or y.shape != (rows,):
+                return False
+
+        for label in meta["labels"]:
+            self.label_id(label)
+        if rows > 0:
+            if self._n == 0:
+                self._X, self._y, self._n = X, y, rows
+                self._X_view = None
+                self._y_view = None
+                self._y_names = None
+                self.version += 1
+            else:
+                self._extend([meta["labels"][i] for i in y], X)
+        return True
+
+    def save_binary(self, base, source_bytes=None):
+        """
+        Write the dataset as a binary snapshot at `base` (see load_binary).
+        `source_bytes` is how much of the text log the snapshot covers;
+        defaults to the current size of the log file.
+
+        Each file is written under a temporary name and renamed over the old one,
+        so processes that have the previous snapshot mapped keep reading it
+        unchanged. The old meta is removed first and the new one written last:
+        a concurrent load() sees either a complete snapshot or none.
+        """
+        if source_bytes is None:
+            source_bytes = os.path.getsize(self.log_file) if os.path.exists(self.log_file) else 0
+        source_mtime, source_tail_sha256 = log_fingerprint(self.log_file, source_bytes)
+        meta = {
+            "version": BINARY_FORMAT_VERSION,
+            "rows": self._n,
+            "labels": self.labels,
+            "source_bytes": source_bytes,
+            "source_mtime_ns": source_mtime,
+            "source_tail_sha256": source_tail_sha256,
+        }
+
+        try:
+            os.remove(base + META_SUFFIX)
+        except FileNotFoundError:
+            pass
+        _replace_file(base + FEATURES_SUFFIX, lambda f: np.save(f, np.ascontiguousarray(self.X, dtype=np.float32)))
+        _replace_file(base + LABELS_SUFFIX, lambda f: np.save(f, np.ascontiguousarray(self.y_ids, dtype=np.int32)))
+        _replace_file(base + META_SUFFIX, lambda f: f.write(json.dumps(meta).encode()))
+
+    def save_text(self, path):
+        """Write the dataset in the text log format."""
+        with open(path, "w") as f:
+            f.write(COMMENT_HEADER)
+            for label_id, features in zip(self.y_ids, self.X):
+                f.write(self.labels[label_id] + "," + ",".join(f"{v:.4f}" for v in features) + "\n")
 
     def log(self, label, features):
         """
-        Append a new sample.
+        Append a new sample. The in-memory store is updated immediately; when
+        buffered, the file write is queued and done in batches by a background
+        thread (call flush() / close() to force it out).
         Writes the comment header only if the file does not exist yet.
         """
-        file_exists = os.path.exists(self.log_file)
+        if self.buffered:
+            if self._writer is None:
+                self._writer = LogWriter(self.log_file, COMMENT_HEADER)
+            self._writer.write(label, features)
+        else:
+            file_exists = os.path.exists(self.log_file)
+
+            with open(self.log_file, "a") as f:
+                if not file_exists:
+                    f.write(COMMENT_HEADER)
+
+                f.write(label + "," + ",".join(f"{v:.4f}" for v in features) + "\n")
 
-        with open(self.log_file, "a") as f:
-            if not file_exists:
-                f.write(COMMENT_HEADER)
+        self._append(label, features)
 
-            f.write(label + "," + ",".join(f"{v:.4f}" for v in features) + "\n")
+    def flush(self):
+        """Write any samples still queued by log() to the log file."""
+        if self._writer is not None:
+            self._writer.flush()
 
-        self.X.append(features)
-        self.y.append(label)
+    def close(self):
+        """Flush queued samples and stop the background writer (a later log() starts a new one)."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def _nearest(self, features, k, max_dist=np.inf):
+        """Return (distances, indices) of the k nearest samples within max_dist, closest first."""
+        self.index.update(self.X)
+        return self.index.query(features, k, max_dist)
+
+    def within(self, features, radius=DIST_THRESHOLD):
+        """Return (distances, indices) of all samples within `radius`, closest first."""
+        self.index.update(self.X)
+        return self.index.query_radius(features, radius)
 
     def predict(self, features):
-        if len(self.X) < K:
+        if self._n < K:
             return ""
 
-        X_np = np.array(self.X)
-        dists = np.linalg.norm(X_np - features, axis=1)
-        idx = np.argsort(dists)[:K]
+        dists, idx = self._nearest(features, K)
 
-        if dists[idx[0]] > DIST_THRESHOLD:
+        if dists[0] > DIST_THRESHOLD:
             return ""
 
-        votes = {}
-        for i in idx:
-            votes[self.y[i]] = votes.get(self.y[i], 0) + 1
+        return self.labels[majority_vote(self.y_ids[idx][None])[0]]
+
+    def top_k(self, features, k=TOP_K_DISPLAY):
+        """
+        Return up to `k` (label, confidence) pairs for the nearest samples,
+        closest first, with duplicate labels removed.
+        """
+        if self._n < k:
+            return []
+
+        # Samples beyond this distance cannot clear CONFIDENCE_THRESHOLD
+        max_dist = DIST_THRESHOLD * (1.0 - CONFIDENCE_THRESHOLD)
+        dists, idx = self._nearest(features, k, max_dist)
+        return self._top_lists(dists[None], self.y_ids[idx][None])[0]
+
+    def top_k_batch(self, features, k=TOP_K_DISPLAY):
+        """
+        top_k() for each row of an (N, NUM_FEATURES) array (e.g. one row per
+        hand). The index scans its pending (not yet indexed) rows once for all
+        queries; each query then walks the tree on its own (see
+        KDTreeIndex.query_many). Returns N lists.
+        """
+        F = np.asarray(features, dtype=np.float64).reshape(-1, NUM_FEATURES)
+        if self._n < k:
+            return [[] for _ in range(len(F))]
+
+        max_dist = DIST_THRESHOLD * (1.0 - CONFIDENCE_THRESHOLD)
+        self.index.update(self.X)
+        y_ids = self.y_ids
+        return [
+            self._top_lists(dists[None], y_ids[idx][None])[0]
+            for dists, idx in self.index.query_many(F, k, max_dist)
+        ]
+
+    def _top_lists(self, dists, ids):
+        """
+        Turn (m, k) neighbour distances / label ids (closest first) into m lists of
+        (label, confidence), keeping confident, first-seen labels only.
+        """
+        conf = _confidences(dists)
+        keep = (conf > CONFIDENCE_THRESHOLD) & _first_occurrence(ids)
+        labels = self.labels
+        return [
+            [(labels[i], float(c)) for i, c in zip(row_ids[row_keep], row_conf[row_keep])]
+            for row_ids, row_conf, row_keep in zip(ids, conf, keep)
+        ]
+
+    def predict_batch(self, features, k=K, top_k=TOP_K_DISPLAY, block_elements=BLOCK_ELEMENTS):
+        """
+        Predict many feature vectors at once.
+
+        features: (N, NUM_FEATURES) array-like.
+        Returns (labels, top_lists, confidences):
+          labels      - list of N predicted labels ("" like predict() when no match)
+          top_lists   - list of N top-K (label, confidence) lists like top_k()
+          confidences - (N,) array, confidence of the nearest sample with the predicted label
+        Distances are computed block-wise so memory stays bounded by `block_elements`.
+        """
+        F = np.asarray(features, dtype=np.float32).reshape(-1, NUM_FEATURES)
+        m = len(F)
+        labels = [""] * m
+        top_lists = [[] for _ in range(m)]
+        confidences = np.zeros(m)
+
+        n_neighbors = min(max(k, top_k), self._n)
+        if n_neighbors == 0 or self._n < min(k, top_k):
+            return labels, top_lists, confidences
+
+        y_ids = self.y_ids
+        for start, dists, idx in nearest_blocks(F, self.X, n_neighbors, block_elements):
+            ids = y_ids[idx]
+            stop = start + len(ids)
+
+            if self._n >= k:
+                winners = majority_vote(ids[:, :k])
+                conf = np.where(ids[:, :k] == winners[:, None], _confidences(dists[:, :k]), 0.0).max(axis=1)
+                matched = dists[:, 0] <= DIST_THRESHOLD
+                for row in np.nonzero(matched)[0]:
+                    labels[start + row] = self.labels[winners[row]]
+                confidences[start:stop] = np.where(matched, conf, 0.0)
+
+            if self._n >= top_k:
+                top_lists[start:stop] = self._top_lists(dists[:, :top_k], ids[:, :top_k])
+
+        return labels, top_lists, confidences
+
+
+def nearest_blocks(Q, X, k, block_elements=BLOCK_ELEMENTS, query_groups=None, sample_groups=None):
+    """
+    Brute-force k nearest rows of X for every row of Q, in blocks of query rows.
+    Yields (start, dists, idx) with (m, k) arrays sorted closest first, where
+    start is the offset of the block in Q.
+    If query_groups / sample_groups (int arrays for Q / X) are given, rows of X in
+    the same group as the query are skipped (distance inf), e.g. for cross-validation.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    Q = np.asarray(Q, dtype=np.float64)
+    n = len(X)
+    k = min(k, n)
+    x_sq = (X ** 2).sum(axis=1)
+    rows = max(1, block_elements // max(1, n))
+
+    for start in range(0, len(Q), rows):
+        q = Q[start:start + rows]
+
+        # ||q - x||^2 = ||q||^2 + ||x||^2 - 2 q.x, clipped for rounding error
+        d2 = (q ** 2).sum(axis=1)[:, None] + x_sq[None, :] - 2.0 * (q @ X.T)
+        np.maximum(d2, 0.0, out=d2)
+        if query_groups is not None:
+            d2[query_groups[start:start + rows, None] == sample_groups[None, :]] = np.inf
+
+        if k < n:
+            idx = np.argpartition(d2, k - 1, axis=1)[:, :k]
+        else:
+            idx = np.broadcast_to(np.arange(n), (len(q), n)).copy()
+        part = np.take_along_axis(d2, idx, axis=1)
+        order = np.argsort(part, axis=1, kind="stable")
+        idx = np.take_along_axis(idx, order, axis=1)
+        yield start, np.sqrt(np.take_along_axis(part, order, axis=1)), idx
+
+def _confidences(dists):
+    """Map neighbour distances to confidences in [0, 1]."""
+    return np.maximum(0.0, 1.0 - dists / DIST_THRESHOLD)
+
+def majority_vote(ids):
+    """
+    Majority label id per row of (m, k) ids (closest first); ties go to the label
+    seen first. Negative ids mark missing neighbours and get no vote (a row with
+    none present gives -1).
+    """
+    present = ids >= 0
+    votes = ((ids[:, :, None] == ids[:, None, :]) & present[:, None, :]).sum(axis=2)
+    votes[~present] = -1
+    first_best = np.argmax(votes == votes.max(axis=1, keepdims=True), axis=1)
+    return ids[np.arange(len(ids)), first_best]
+
+def _first_occurrence(ids):
+    """(m, k) mask that is True where a label id appears for the first time in its row."""
+    k = ids.shape[1]
+    earlier = np.tril(np.ones((k, k), dtype=bool), -1)
+    return ~((ids[:, :, None] == ids[:, None, :]) & earlier).any(axis=2)
+
+def binary_base(log_file):
+    """Return the binary snapshot base path for a text log (dataset.txt -> dataset)."""
+    return os.path.splitext(log_file)[0]
+
+def _replace_file(path, write):
+    """Call write(file) on a temporary file next to `path`, then rename it over `path`."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+def log_fingerprint(log_file, nbytes):
+    """
+    Return (mtime in ns, SHA-256 hex of the last SNAPSHOT_HASH_BYTES of the
+    first `nbytes`) of a text log, or (None, None) if missing.
+    """
+    try:
+        mtime = os.stat(log_file).st_mtime_ns
+        start = max(0, nbytes - SNAPSHOT_HASH_BYTES)
+        with open(log_file, "rb") as f:
+            f.seek(start)
+            tail = f.read(nbytes - start)
+    except OSError:
+        return None, None
+    return mtime, hashlib.sha256(tail).hexdigest()
+
+def snapshot_matches_log(meta, log_file):
+    """
+    True if the text log still looks like the one a snapshot was built from: at
+    least as long as the covered bytes, with the same bytes at their end, and
+    (while the log has not grown, since appends change it) the same mtime.
+    Constant time: only a bounded tail of the log is read.
+    """
+    log_size = os.path.getsize(log_file) if os.path.exists(log_file) else 0
+    source_bytes = meta["source_bytes"]
+    if source_bytes > log_size or "source_tail_sha256" not in meta:
+        return False
+
+    mtime, tail_sha256 = log_fingerprint(log_file, source_bytes)
+    if log_size == source_bytes and mtime != meta.get("source_mtime_ns"):
+        return False
+    return tail_sha256 == meta["source_tail_sha256"]
 
-        return max(votes, key=votes.get)
+def read_binary_meta(base):
+    """Return the parsed meta header of a binary snapshot, or None if missing/unsupported."""
+    try:
+        with open(base + META_SUFFIX, "r") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != BINARY_FORMAT_VERSION:
+        return None
+    return meta
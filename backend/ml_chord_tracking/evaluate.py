@@ -0,0 +1,191 @@
+## Offline evaluation of the kNN chord classifier
+##
+##   python -m backend.ml_chord_tracking.evaluate [--dataset dataset.txt] [--folds 5 | --folds 0 (leave-one-out)]
+##
+## Neighbours for every held-out sample come from one blocked pairwise-distance
+## pass; the K / DIST_THRESHOLD / CONFIDENCE_THRESHOLD sweep reuses them.
+
+import argparse
+import time
+import numpy as np
+from .dataset import Dataset, LOG_FILE, nearest_blocks, majority_vote
+from .parameters import K, DIST_THRESHOLD, CONFIDENCE_THRESHOLD, TOP_K_DISPLAY
+from .timing import summarize, format_summary
+
+# Number of single queries timed for the latency report
+LATENCY_QUERIES = 500
+
+def assign_folds(n, folds, seed=0, contiguous=False):
+    """
+    Fold id per sample. folds=0 means leave-one-out. contiguous=True keeps
+    file order (consecutive auto-logged samples stay in the same fold).
+    """
+    if folds <= 0 or folds >= n:
+        return np.arange(n)
+    if contiguous:
+        return np.arange(n) * folds // n
+    return np.random.default_rng(seed).permutation(n) % folds
+
+def cross_val_neighbors(dataset, n_neighbors, fold_ids):
+    """
+    (n, n_neighbors) distances and label ids of each sample's nearest neighbours
+    outside its own fold, closest first. Missing neighbours (fewer than
+    n_neighbors samples outside the fold) have distance inf and label id -1,
+    which majority_vote ignores; that includes the in-fold rows (the query
+    itself among them) nearest_blocks returns at distance inf to fill k.
+    """
+    n = len(dataset)
+    dists = np.full((n, n_neighbors), np.inf)
+    ids = np.full((n, n_neighbors), -1, dtype=np.int64)
+    y_ids = dataset.y_ids
+    for start, d, idx in nearest_blocks(dataset.X, dataset.X, n_neighbors,
+                                        query_groups=fold_ids, sample_groups=fold_ids):
+        stop = start + len(d)
+        block_ids = y_ids[idx].astype(np.int64)
+        block_ids[np.isinf(d)] = -1
+        dists[start:stop, :d.shape[1]] = d
+        ids[start:stop, :d.shape[1]] = block_ids
+    return dists, ids
+
+def predict_from_neighbors(dists, ids, k=K, dist_threshold=DIST_THRESHOLD):
+    """Dataset.predict semantics over precomputed neighbours; -1 where no prediction."""
+    pred = majority_vote(ids[:, :k])
+    return np.where(dists[:, 0] <= dist_threshold, pred, -1)
+
+def displayed_from_neighbors(dists, ids, dist_threshold=DIST_THRESHOLD, conf_threshold=CONFIDENCE_THRESHOLD):
+    """Top-1 label shown by Dataset.top_k over precomputed neighbours; -1 where nothing is shown."""
+    conf = np.maximum(0.0, 1.0 - dists[:, 0] / dist_threshold)
+    return np.where(conf > conf_threshold, ids[:, 0], -1)
+
+def confusion_matrix(true, pred, n_labels):
+    """(n_labels, n_labels + 1) counts; the last column counts 'no prediction'."""
+    matrix = np.zeros((n_labels, n_labels + 1), dtype=np.int64)
+    np.add.at(matrix, (true, np.where(pred < 0, n_labels, pred)), 1)
+    return matrix
+
+def sweep(dists, ids, true, ks, dist_thresholds, conf_thresholds):
+    """
+    Evaluate every (k, dist_threshold) for predict() and every
+    (dist_threshold, conf_threshold) for the displayed top-1.
+    Returns two lists of dicts with accuracy, coverage and precision.
+    """
+    def scores(pred):
+        answered = pred >= 0
+        correct = pred == true
+        return {
+            "accuracy": float(correct.mean()),
+            "coverage": float(answered.mean()),
+            "precision": float(correct[answered].mean()) if answered.any() else 0.0,
+        }
+
+    predict_rows = []
+    for k in ks:
+        for dist in dist_thresholds:
+            predict_rows.append({"k": k, "dist": dist, **scores(predict_from_neighbors(dists, ids, k, dist))})
+
+    display_rows = []
+    for dist in dist_thresholds:
+        for conf in conf_thresholds:
+            display_rows.append({"dist": dist, "conf": conf, **scores(displayed_from_neighbors(dists, ids, dist, conf))})
+
+    return predict_rows, display_rows
+
+def time_queries(dataset, queries):
+    """Latency of single predict() / top_k() calls and of one predict_batch() over `queries`."""
+    clock = time.perf_counter
+    dataset.top_k(queries[0], TOP_K_DISPLAY)  # builds the index
+
+    single_predict = []
+    single_top_k = []
+    for q in queries:
+        t0 = clock()
+        dataset.predict(q)
+        t1 = clock()
+        dataset.top_k(q, TOP_K_DISPLAY)
+        single_top_k.append(clock() - t1)
+        single_predict.append(t1 - t0)
+
+    t0 = clock()
+    dataset.predict_batch(queries)
+    batch = clock() - t0
+    return summarize(single_predict), summarize(single_top_k), batch
+
+def _parse_list(text, cast=float):
+    return [cast(v) for v in text.split(",") if v.strip()]
+
+def _format_confusion(matrix, labels):
+    names = list(labels) + ["-"]
+    width = max(5, max(len(n) for n in names) + 1)
+    lines = [" " * width + "".join(n.rjust(width) for n in names)]
+    for label, row in zip(labels, matrix):
+        lines.append(label.rjust(width) + "".join(str(v).rjust(width) for v in row))
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cross-validate the kNN chord classifier on a dataset.")
+    parser.add_argument("--dataset", default=LOG_FILE)
+    parser.add_argument("--folds", type=int, default=5, help="number of folds (0 = leave-one-out)")
+    parser.add_argument("--contiguous", action="store_true", help="split folds in file order instead of randomly")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--k", default=f"1,{K},5,7", help="comma-separated K values to sweep")
+    parser.add_argument("--dist", default=f"0.3,0.45,{DIST_THRESHOLD},0.8", help="DIST_THRESHOLD values to sweep")
+    parser.add_argument("--conf", default=f"0.3,0.4,{CONFIDENCE_THRESHOLD},0.6,0.7", help="CONFIDENCE_THRESHOLD values to sweep")
+    args = parser.parse_args(argv)
+
+    dataset = Dataset(args.dataset)
+    n = len(dataset)
+    if n < 2:
+        print(f"Dataset '{args.dataset}' has too few samples ({n})")
+        return
+
+    ks = _parse_list(args.k, int)
+    dist_thresholds = _parse_list(args.dist)
+    conf_thresholds = _parse_list(args.conf)
+
+    fold_ids = assign_folds(n, args.folds, args.seed, args.contiguous)
+    t0 = time.perf_counter()
+    dists, ids = cross_val_neighbors(dataset, max(ks + [K]), fold_ids)
+    neighbor_time = time.perf_counter() - t0
+
+    true = np.asarray(dataset.y_ids, dtype=np.int64)
+    labels = dataset.labels
+    scheme = "leave-one-out" if len(np.unique(fold_ids)) == n else f"{len(np.unique(fold_ids))}-fold"
+    print(f"Dataset: {n} samples, {len(labels)} labels, {scheme} "
+          f"(neighbours for all samples in {neighbor_time * 1000:.1f}ms)")
+
+    # Current parameters
+    pred = predict_from_neighbors(dists, ids, K, DIST_THRESHOLD)
+    matrix = confusion_matrix(true, pred, len(labels))
+    print(f"\nPer-chord accuracy (K={K}, DIST_THRESHOLD={DIST_THRESHOLD}):")
+    for label_id, label in enumerate(labels):
+        count = matrix[label_id].sum()
+        if count:
+            print(f"  {label:>6}: {matrix[label_id, label_id] / count * 100:5.1f}%  ({count} samples)")
+    print(f"  {'all':>6}: {(pred == true).mean() * 100:5.1f}%")
+
+    print("\nConfusion matrix (rows = true, columns = predicted, '-' = no prediction):")
+    print(_format_confusion(matrix, labels))
+
+    predict_rows, display_rows = sweep(dists, ids, true, ks, dist_thresholds, conf_thresholds)
+    print("\npredict() sweep:")
+    print("     K   dist  accuracy  coverage  precision")
+    for r in predict_rows:
+        print(f"  {r['k']:4d}  {r['dist']:5.2f}  {r['accuracy'] * 100:7.1f}%  {r['coverage'] * 100:7.1f}%  {r['precision'] * 100:8.1f}%")
+
+    print("\nDisplayed top-1 sweep:")
+    print("   dist   conf  accuracy  coverage  precision")
+    for r in display_rows:
+        print(f"  {r['dist']:5.2f}  {r['conf']:5.2f}  {r['accuracy'] * 100:7.1f}%  {r['coverage'] * 100:7.1f}%  {r['precision'] * 100:8.1f}%")
+
+    # Query latency on the full dataset
+    rng = np.random.default_rng(args.seed)
+    queries = np.asarray(dataset.X)[rng.integers(0, n, min(LATENCY_QUERIES, n))]
+    predict_summary, top_k_summary, batch = time_queries(dataset, queries)
+    print("\nQuery latency:")
+    print("  " + format_summary("predict()", predict_summary))
+    print("  " + format_summary("top_k()", top_k_summary))
+    print(f"  predict_batch(): {len(queries)} queries in {batch * 1000:.2f}ms "
+          f"({len(queries) / batch:.0f} queries/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import os
+import time
+import cv2
+import numpy as np
+
+# Image extensions picked up by ImageFolderSource
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+class FrameSource:
+    """
+    Base class for frame sources. Sources follow the subset of the
+    cv2.VideoCapture interface the tracker uses: isOpened(), read(image=None)
+    -> (ok, frame), set(prop, value) and release(). read() fills `image` in
+    place when it is given and has the right shape, like VideoCapture.read.
+
+    With fps set, read() is paced to that rate (real-time playback); with
+    fps=None frames are returned as fast as possible and the source is
+    `offline` (a FrameGrabber then hands out every frame instead of dropping).
+    """
+
+    def __init__(self, fps=None):
+        self.fps = fps
+        self._next_time = None
+        self._opened = True
+
+    @property
+    def offline(self):
+        """True for unpaced file/generated sources, whose frames should all be processed."""
+        return not self.fps
+
+    def isOpened(self):
+        return self._opened
+
+    def set(self, prop, value):
+        return False
+
+    def release(self):
+        self._opened = False
+
+    def _pace(self):
+        if not self.fps:
+            return
+        now = time.perf_counter()
+        if self._next_time is None or now - self._next_time > 1.0:
+            # First frame, or we fell far behind: restart the schedule
+            self._next_time = now
+        elif self._next_time > now:
+            time.sleep(self._next_time - now)
+        self._next_time += 1.0 / self.fps
+
+    @staticmethod
+    def _into(image, frame):
+        """Copy frame into image when it fits (to reuse the caller's buffer)."""
+        if image is not None and image.shape == frame.shape and image.dtype == frame.dtype:
+            np.copyto(image, frame)
+            return image
+        return frame
+
+class CameraSource(FrameSource):
+    """Live capture device (wraps cv2.VideoCapture(device))."""
+
+    def __init__(self, device=0):
+        super().__init__()
+        self.cap = cv2.VideoCapture(device)
+
+    @property
+    def offline(self):
+        return False
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self, image=None):
+        return self.cap.read(image) if image is not None else self.cap.read()
+
+    def set(self, prop, value):
+        return self.cap.set(prop, value)
+
+    def release(self):
+        self.cap.release()
+
+class VideoFileSource(FrameSource):
+    """
+    Frames from a video file. realtime=True plays at the file's frame rate;
+    realtime=False returns frames as fast as they decode. loop=True restarts at the end.
+    """
+
+    def __init__(self, path, realtime=True, loop=False):
+        self.cap = cv2.VideoCapture(path)
+        file_fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        super().__init__(fps=file_fps if realtime else None)
+        self.path = path
+        self.loop = loop
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self, image=None):
+        self._pace()
+        ret, frame = self.cap.read(image) if image is not None else self.cap.read()
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read(image) if image is not None else self.cap.read()
+        return ret, frame
+
+    def release(self):
+        self.cap.release()
+
+class ImageFolderSource(FrameSource):
+    """Frames from the images in a directory, in file name order."""
+
+    def __init__(self, directory, fps=None, loop=False):
+        super().__init__(fps=fps)
+        self.paths = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        self.loop = loop
+        self._index = 0
+        if not self.paths:
+            self._opened = False
+
+    def read(self, image=None):
+        if not self._opened:
+            return False, None
+        if self._index >= len(self.paths):
+            if not self.loop:
+                return False, None
+            self._index = 0
+
+        self._pace()
+        frame = cv2.imread(self.paths[self._index])
+        self._index += 1
+        if frame is None:
+            return False, None
+        return True, self._into(image, frame)
+
+class SyntheticSource(FrameSource):
+    """
+    Generated BGR frames (a moving gradient with a frame counter), for
+    exercising capture/recognizer throughput without any input files.
+    n_frames=None generates forever.
+    """
+
+    def __init__(self, width=640, height=480, fps=None, n_frames=None):
+        super().__init__(fps=fps)
+        self.width = width
+        self.height = height
+        self.n_frames = n_frames
+        self._count = 0
+        # Integer pixel values, wrapped explicitly: out-of-range float -> uint8
+        # casts differ between platforms
+        self._ramp = np.linspace(0, 255, width).astype(np.int32)[None, :]
+        self._rows = (np.arange(height) % 256).astype(np.uint8)[:, None]
+
+    def read(self, image=None):
+        if not self._opened or (self.n_frames is not None and self._count >= self.n_frames):
+            return False, None
+        self._pace()
+
+        if image is None or image.shape != (self.height, self.width, 3):
+            image = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        shift = (self._count * 4) % 256
+        image[:, :, 0] = ((self._ramp + shift) % 256).astype(np.uint8)
+        image[:, :, 1] = self._rows
+        image[:, :, 2] = shift
+        cv2.putText(image, str(self._count), (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+        self._count += 1
+        return True, image
+
+def open_source(source=0, realtime=True):
+    """
+    Build a frame source from a spec: an existing FrameSource/VideoCapture-like
+    object (returned as is), a device index, "synthetic", a directory of images
+    or a video file path. `realtime` paces file/folder playback (30 fps for folders).
+    """
+    if hasattr(source, "read"):
+        return source
+    if isinstance(source, int) or (isinstance(source, str) and source.isdigit()):
+        return CameraSource(int(source))
+    if source == "synthetic":
+        return SyntheticSource(fps=30.0 if realtime else None)
+    if os.path.isdir(source):
+        return ImageFolderSource(source, fps=30.0 if realtime else None)
+    if os.path.isfile(source):
+        return VideoFileSource(source, realtime=realtime)
+    raise ValueError(f"Unknown frame source '{source}'")
@@ -1,5 +1,5 @@
-import math
 import numpy as np
+from .parameters import FRETTING_HAND
 
 FINGERS = {
     "Index":  [5, 6, 7, 8],
@@ -8,46 +8,114 @@ FINGERS = {
     "Pinky":  [17, 18, 19, 20],
 }
 
-def angle(a, b, c):
+# Landmark indices per finger as a (4 fingers, 4 joints) array: mcp, pip, dip, tip
+FINGER_IDX = np.array(list(FINGERS.values()))
+
+NUM_LANDMARKS = 21
+
+def landmarks_to_array(hand, w, h, origin=(0, 0)):
+    """
+    Convert one MediaPipe hand (sequence of 21 landmarks with normalized x/y)
+    to a (21, 2) float array in pixel units, without rounding.
+    `origin` is added when the landmarks are normalized to a crop at that offset.
+    """
+    pts = np.array([(lm.x, lm.y) for lm in hand], dtype=np.float64)
+    pts *= (w, h)
+    pts += origin
+    return pts
+
+def normalize_hands(pts):
     """
-    Angle at point b between points a-b-c
-    Handles zero-length vectors and floating point errors.
+    Vectorized normalize_hand over a (21, 2) or (N, 21, 2) array.
+    Centers on the wrist, rotates so wrist->middle MCP points along +y and
+    scales by that distance (palm size). Returns an array of the same shape.
     """
-    ba = np.array(a) - np.array(b)
-    bc = np.array(c) - np.array(b)
-    mag = np.linalg.norm(ba) * np.linalg.norm(bc)
-    if mag < 1e-6:
-        return 0.0
-    cos_angle = np.dot(ba, bc) / mag
-    cos_angle = min(1.0, max(-1.0, cos_angle))
-    return math.degrees(math.acos(cos_angle))
+    pts = np.asarray(pts, dtype=np.float64)
+    single = pts.ndim == 2
+    if single:
+        pts = pts[None]
+
+    centered = pts - pts[:, 0:1, :]
+
+    direction = centered[:, 9, :]
+    theta = -np.arctan2(direction[:, 0], direction[:, 1])
+    cos, sin = np.cos(theta), np.sin(theta)
+    # R = [[cos, -sin], [sin, cos]] applied to every point: p' = R @ p
+    rotated = np.empty_like(centered)
+    rotated[..., 0] = cos[:, None] * centered[..., 0] - sin[:, None] * centered[..., 1]
+    rotated[..., 1] = sin[:, None] * centered[..., 0] + cos[:, None] * centered[..., 1]
+
+    palm_size = np.linalg.norm(rotated[:, 9, :], axis=1)
+    palm_size[palm_size == 0] = 1.0
+
+    normalized = rotated / palm_size[:, None, None]
+    return normalized[0] if single else normalized
 
 def normalize_hand(pts):
-    wrist = np.array(pts[0])
-    middle_mcp = np.array(pts[9])
+    return list(normalize_hands(pts))
 
-    centered = [np.array(p) - wrist for p in pts]
+def compute_features_batch(pts):
+    """
+    Feature extraction over a (21, 2) or (N, 21, 2) landmark array.
+    Returns an (N, 8) array: per finger, PIP bend angle / 180 and tip distance
+    from the wrist (same values and order as compute_features).
+    """
+    pts = np.asarray(pts, dtype=np.float64)
+    if pts.ndim == 2:
+        pts = pts[None]
 
-    direction = middle_mcp - wrist
-    theta = -math.atan2(direction[0], direction[1])
-    R = np.array([[math.cos(theta), -math.sin(theta)],
-                  [math.sin(theta), math.cos(theta)]])
+    normalized = normalize_hands(pts)
+    joints = normalized[:, FINGER_IDX, :]  # (N, 4 fingers, 4 joints, 2)
+    mcp, pip, dip, tip = joints[:, :, 0], joints[:, :, 1], joints[:, :, 2], joints[:, :, 3]
 
-    rotated = [R @ p for p in centered]
+    # Angle at the PIP joint between MCP and DIP; 0 for degenerate vectors
+    ba = mcp - pip
+    bc = dip - pip
+    mag = np.linalg.norm(ba, axis=2) * np.linalg.norm(bc, axis=2)
+    dot = (ba * bc).sum(axis=2)
+    safe = mag >= 1e-6
+    cos_angle = np.clip(dot / np.where(safe, mag, 1.0), -1.0, 1.0)
+    bend = np.where(safe, np.degrees(np.arccos(cos_angle)), 0.0) / 180.0
 
-    palm_size = np.linalg.norm(rotated[9])
-    if palm_size == 0:
-        palm_size = 1.0
+    tip_dist = np.linalg.norm(tip, axis=2)
 
-    normalized = [p / palm_size for p in rotated]
-    return normalized
+    features = np.empty((len(pts), 2 * len(FINGER_IDX)))
+    features[:, 0::2] = bend
+    features[:, 1::2] = tip_dist
+    return features
 
 def compute_features(pts):
-    normalized = normalize_hand(pts)
-    features = []
-    for idx in FINGERS.values():
-        mcp, pip, dip, tip = idx
-        ang = angle(normalized[mcp], normalized[pip], normalized[dip])
-        tip_dist = np.linalg.norm(normalized[tip])
-        features.extend([ang / 180.0, tip_dist])
-    return features
+    return compute_features_batch(pts)[0].tolist()
+
+def hands_to_array(hands, w, h, origin=(0, 0)):
+    """landmarks_to_array over a list of MediaPipe hands; returns an (N, 21, 2) array."""
+    pts = np.array([[(lm.x, lm.y) for lm in hand] for hand in hands], dtype=np.float64)
+    pts = pts.reshape(len(hands), NUM_LANDMARKS, 2)
+    pts *= (w, h)
+    pts += origin
+    return pts
+
+def handedness_of(result):
+    """Return [(label, score)] per detected hand of a MediaPipe result ("Left"/"Right")."""
+    hands = getattr(result, "hand_landmarks", None) or []
+    handedness = getattr(result, "handedness", None) or []
+    out = []
+    for i in range(len(hands)):
+        categories = handedness[i] if i < len(handedness) else None
+        if categories:
+            out.append((categories[0].category_name, float(categories[0].score)))
+        else:
+            out.append(("", 0.0))
+    return out
+
+def fretting_hand_index(handedness, fretting=FRETTING_HAND):
+    """
+    Index of the fretting hand in a handedness_of() list: the most confident hand
+    labelled `fretting`, else the first hand. None when there are no hands.
+    """
+    if not handedness:
+        return None
+    matches = [i for i, (label, _) in enumerate(handedness) if label == fretting]
+    if not matches:
+        return 0
+    return max(matches, key=lambda i: handedness[i][1])
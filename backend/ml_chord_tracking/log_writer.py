@@ -0,0 +1,105 @@
+import atexit
+import os
+import threading
+import numpy as np
+
+# Flush queued samples once this many are waiting...
+FLUSH_SAMPLES = 64
+# ...or once the oldest queued sample has waited this long (seconds)
+FLUSH_INTERVAL = 1.0
+
+class LogWriter:
+    """
+    Write-behind appender for the text dataset log.
+
+    write() only queues the sample; a background thread formats and appends
+    queued samples in batches (one open/write/close per batch) when FLUSH_SAMPLES
+    are waiting or FLUSH_INTERVAL has passed. flush() writes everything queued
+    before returning, and close() also stops the thread. The header is written
+    when the file does not exist yet.
+    """
+
+    def __init__(self, path, header, flush_samples=FLUSH_SAMPLES, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.header = header
+        self.flush_samples = flush_samples
+        self.flush_interval = flush_interval
+
+        self._pending = []
+        self._cond = threading.Condition()
+        # Serializes file writes between the background thread and flush()
+        self._io_lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+
+        # Counters for diagnostics
+        self.samples_written = 0
+        self.batches_written = 0
+
+    def write(self, label, features):
+        """Queue one sample (label string, feature sequence) for writing."""
+        row = np.array(features, dtype=np.float64)
+        with self._cond:
+            if self._closed:
+                raise ValueError("LogWriter is closed")
+            self._pending.append((label, row))
+            if self._thread is None:
+                self._start()
+            if len(self._pending) >= self.flush_samples:
+                self._cond.notify()
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, name="dataset-log-writer", daemon=True)
+        self._thread.start()
+        # Daemon threads die at exit; make sure queued samples still reach disk
+        atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                # Give the batch time to fill unless it is already large enough
+                if len(self._pending) < self.flush_samples:
+                    self._cond.wait(self.flush_interval)
+                    if self._closed:
+                        return
+            self.flush()
+
+    def flush(self):
+        """Write all queued samples now (on the calling thread)."""
+        # Batches are taken and written under one lock so they land in queue order
+        with self._io_lock:
+            with self._cond:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+
+            lines = [label + "," + ",".join(f"{v:.4f}" for v in row) + "\n" for label, row in batch]
+            file_exists = os.path.exists(self.path)
+            with open(self.path, "a") as f:
+                if not file_exists:
+                    f.write(self.header)
+                f.writelines(lines)
+            self.samples_written += len(batch)
+            self.batches_written += 1
+
+    def close(self):
+        """Stop the background thread and flush anything still queued. Safe to call twice."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self.flush()
+        atexit.unregister(self.close)
+
+    @property
+    def pending(self):
+        """Number of samples queued but not yet written."""
+        with self._cond:
+            return len(self._pending)
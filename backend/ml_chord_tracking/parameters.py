@@ -10,11 +10,39 @@ TOP_K_DISPLAY = 3
 K = 3
 DIST_THRESHOLD = 0.6
 
+# Reuse the previous top-K when the features moved less than this (L2 distance)
+CACHE_EPSILON = 0.01
+
+# Recognizer results older than this (ms since their frame was submitted) are dropped
+MAX_RESULT_AGE_MS = 250
+
+# Recognizer input: longest side of the image sent to MediaPipe (None = no downscaling)
+INFERENCE_MAX_SIDE = 480
+
+# Crop the recognizer input to the previous frame's hands, padded by this fraction
+# of the hand box on each side (None = always send the full frame)
+ROI_PADDING = 0.6
+
+# Smallest crop, as a fraction of the frame's shorter side
+ROI_MIN_SIZE = 0.3
+
+# Send the full frame every N submissions anyway, so new hands are picked up
+ROI_FULL_FRAME_EVERY = 15
+
+# Maximum number of hands the recognizer detects per frame
+NUM_HANDS = 2
+
+# Handedness label (as reported by MediaPipe) of the hand whose chord is tracked.
+# MediaPipe assumes a mirrored (selfie) image, so with an unmirrored webcam a
+# player's left (fretting) hand is reported as "Right".
+FRETTING_HAND = "Right"
+
 # Automatic logging interval (seconds)
 DEFAULT_INTERVAL = 0.2
 
 # Skeleton drawing color (BGR)
 SKELETON_COLOR = (64, 224, 208)  # soft teal
+OTHER_HAND_COLOR = (160, 160, 160)  # grey, for hands other than the fretting hand
 
 # Font parameters for overlay text
 FONT = cv2.FONT_HERSHEY_SIMPLEX
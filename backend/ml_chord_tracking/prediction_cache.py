@@ -0,0 +1,68 @@
+import numpy as np
+from .parameters import CACHE_EPSILON, TOP_K_DISPLAY
+
+class PredictionCache:
+    """
+    Frame-to-frame cache in front of Dataset.top_k.
+
+    While a chord is held, consecutive frames give nearly identical features.
+    If the new features are within `epsilon` (L2) of the last query that was
+    actually computed, the previous top-K is returned without touching the
+    dataset. Comparing against the last computed query (not the last frame)
+    keeps slow drift from accumulating past epsilon. Any change to the dataset
+    (Dataset.version, bumped by log()) invalidates the cache.
+
+    Several queries per frame (e.g. one per hand) are cached independently by
+    slot; top_k() uses a single default slot.
+    """
+
+    def __init__(self, epsilon=CACHE_EPSILON):
+        self.epsilon = epsilon
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}  # slot -> (features, preds) of the last computed query
+        self._key = None
+
+    def top_k(self, dataset, features, k=TOP_K_DISPLAY):
+        return self.top_k_many(dataset, [features], [None], k)[0]
+
+    def top_k_many(self, dataset, features, slots, k=TOP_K_DISPLAY):
+        """
+        top_k for several feature vectors, one per slot (any hashable, e.g. the
+        hand's handedness). Misses are ranked together in one Dataset.top_k_batch call.
+        """
+        features = np.asarray(features, dtype=np.float64).reshape(len(slots), -1)
+        key = (id(dataset), dataset.version, k)
+        if key != self._key:
+            self._entries = {}
+            self._key = key
+
+        preds = [None] * len(slots)
+        missed = []
+        for j, slot in enumerate(slots):
+            entry = self._entries.get(slot)
+            if entry is not None and np.linalg.norm(features[j] - entry[0]) <= self.epsilon:
+                self.hits += 1
+                preds[j] = entry[1]
+            else:
+                missed.append(j)
+
+        if missed:
+            self.misses += len(missed)
+            computed = dataset.top_k_batch(features[missed], k)
+            for j, p in zip(missed, computed):
+                preds[j] = p
+                self._entries[slots[j]] = (features[j].copy(), p)
+        return preds
+
+    def invalidate(self):
+        self._entries = {}
+        self._key = None
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,353 @@
+## Out-of-process chord tracker
+##
+## ProcessChordTracker runs a ChordTracker (capture, MediaPipe, kNN) in a child
+## process so the game loop never competes with it for the GIL. It has the same
+## prediction API as ChordTracker:
+##
+##   tracker = ProcessChordTracker(source=0)
+##   tracker.start()
+##   tracker.get_prediction()
+##   tracker.stop()
+##
+## The child publishes through SharedSlot latest-value slots in shared memory:
+## the newest camera frame, the hand landmarks, the predictions and (once a
+## second) get_stats(). Readers only hold a slot's lock for the copy, and
+## wait_for_prediction() / subscribers sleep until the child notifies a write.
+
+import json
+import multiprocessing
+import threading
+import time
+import numpy as np
+from .dataset import LOG_FILE
+from .parameters import NUM_HANDS
+from .hand_tracker import NUM_LANDMARKS, hands_to_array
+from .shared_slots import SharedSlot
+
+# Largest frame the frame slot holds (bigger frames are not published)
+MAX_FRAME_BYTES = 1920 * 1080 * 3
+
+# Room for the JSON-encoded predictions and stats
+PREDICTION_BYTES = 1 << 16
+STATS_BYTES = 1 << 18
+
+# How often the child publishes get_stats() (seconds)
+STATS_INTERVAL = 1.0
+
+# Frame slot header: timestamp, height, width, channels (float64)
+FRAME_HEADER = 4
+# Landmark slot header: timestamp, number of hands (float64)
+LANDMARK_HEADER = 2
+
+def _process_main(slot_handles, stop_event, source, log_file, show_windows, record_path, stats_path):
+    """Child process: run a ChordTracker and publish its output to the shared slots."""
+    from .chord_tracking import ChordTracker
+    from .dataset import Dataset
+
+    slots = {key: SharedSlot.attach(handle) for key, handle in slot_handles.items()}
+    header = np.empty(FRAME_HEADER)
+
+    def publish_frame(frame):
+        if frame.nbytes > slots["frame"].capacity - header.nbytes:
+            return
+        header[:] = (time.time(), *frame.shape[:2], frame.shape[2] if frame.ndim == 3 else 1)
+        slots["frame"].write(header, frame)
+
+    tracker = ChordTracker(dataset=Dataset(log_file), source=source, on_frame=publish_frame)
+    last_stats = 0.0
+
+    def publish_predictions(preds):
+        nonlocal last_stats
+        result, ts, region = tracker.results.latest()
+        hands = getattr(result, "hand_landmarks", None) or []
+        if hands and region is not None:
+            pts = hands_to_array(hands[:NUM_HANDS], region[2], region[3], region[:2])
+        else:
+            pts = np.empty((0, NUM_LANDMARKS, 2))
+        slots["landmarks"].write(np.array([time.time(), len(pts)]), pts)
+
+        payload = {"preds": preds, "hands": tracker.get_hand_predictions()}
+        slots["predictions"].write(json.dumps(payload).encode())
+
+        now = time.perf_counter()
+        if now - last_stats >= STATS_INTERVAL:
+            last_stats = now
+            slots["stats"].write(json.dumps(tracker.get_stats()).encode())
+
+    tracker.subscribe(publish_predictions)
+    try:
+        tracker.run(show_windows, record_path, stats_path=stats_path, stop_event=stop_event)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        slots["stats"].write(json.dumps(tracker.get_stats()).encode())
+        for slot in slots.values():
+            slot.close()
+
+class ProcessChordTracker:
+    """
+    ChordTracker running in a child process (see module comment).
+
+    source: frame source spec for the child (camera index, video file, image
+            directory or "synthetic"; FrameSource objects can't cross processes).
+    log_file: dataset log the child loads and auto-logs into.
+    """
+
+    def __init__(self, source=0, log_file=LOG_FILE, max_frame_bytes=MAX_FRAME_BYTES):
+        self.source = source
+        self.log_file = log_file
+        self.max_frame_bytes = max_frame_bytes
+
+        self._latest_preds = None
+        self._latest_hand_preds = []
+        self._preds_seq = 0  # slot sequence number of latest_preds
+        self._preds_lock = threading.Lock()
+        self._stats = {}
+        self._stats_seq = 0
+
+        self._subscribers = []
+        self._poller = None
+
+        self._slots = None
+        self._process = None
+        self._stop_event = None
+        self._started = False
+        self._dataset = None
+
+    @property
+    def dataset(self):
+        """
+        The dataset log loaded in this process (on first use), for callers that
+        read tracker.dataset. The child keeps its own copy: samples it auto-logs
+        after this was loaded aren't included.
+        """
+        if self._dataset is None:
+            from .dataset import Dataset
+            self._dataset = Dataset(self.log_file)
+        return self._dataset
+
+    # ================== Lifecycle ==================
+    @property
+    def running(self):
+        return self._started
+
+    def start(self, show_windows=False, record_path=None, source=None, stats_path=None):
+        """
+        Start the tracker process. Returns immediately; arguments as ChordTracker.start.
+        Call stop() to stop.
+        """
+        if self._started:
+            return
+        # spawn: the child starts clean instead of inheriting this process's threads
+        context = multiprocessing.get_context("spawn")
+        self._slots = {
+            "frame": SharedSlot(FRAME_HEADER * 8 + self.max_frame_bytes, context=context),
+            "landmarks": SharedSlot(LANDMARK_HEADER * 8 + NUM_HANDS * NUM_LANDMARKS * 2 * 8, context=context),
+            "predictions": SharedSlot(PREDICTION_BYTES, context=context),
+            "stats": SharedSlot(STATS_BYTES, context=context),
+        }
+        self._stop_event = context.Event()
+        self._process = context.Process(
+            target=_process_main,
+            args=({key: slot.handle() for key, slot in self._slots.items()}, self._stop_event,
+                  self.source if source is None else source, self.log_file,
+                  show_windows, record_path, stats_path),
+            name="chord-tracker",
+            daemon=True,
+        )
+        self._process.start()
+        self._started = True
+        if self._subscribers:
+            self._start_poller()
+
+    def stop(self, timeout=2.0):
+        """Stop the tracker process (waiting up to `timeout` seconds) and free the shared memory."""
+        if not self._started:
+            return
+        self._stop_event.set()
+        self._process.join(timeout=timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
+        self._started = False
+        # End the waits of wait_for_prediction() callers and the subscriber thread,
+        # including any that are about to start
+        self._slots["predictions"].interrupt()
+        if self._poller is not None:
+            # A subscriber callback may still be running; don't hang on it
+            self._poller.join(timeout)
+            self._poller = None
+        # Keep the final values readable after the slots are gone
+        self._read_predictions()
+        self.get_stats()
+        for slot in self._slots.values():
+            slot.close()
+            slot.unlink()
+        self._slots = None
+        self._process = None
+        self._stop_event = None
+
+    # ================== Predictions ==================
+    def _read_predictions(self):
+        """Pull newer predictions from the slot, if any. Returns True if there were."""
+        with self._preds_lock:
+            if self._slots is None:
+                return False
+            value = self._slots["predictions"].read(self._preds_seq)
+            if value is None:
+                return False
+            self._preds_seq, payload = value
+            data = json.loads(payload)
+            self._latest_preds = [(label, conf) for label, conf in data["preds"]]
+            self._latest_hand_preds = [
+                dict(hand, preds=[(label, conf) for label, conf in hand["preds"]]) for hand in data["hands"]
+            ]
+            return True
+
+    @property
+    def latest_preds(self):
+        """Latest top-K list [(label, confidence)] of the fretting hand, or None."""
+        self._read_predictions()
+        return self._latest_preds
+
+    @property
+    def latest_hand_preds(self):
+        """Per-hand predictions of the latest frame (see get_hand_predictions)."""
+        self._read_predictions()
+        return self._latest_hand_preds
+
+    def get_prediction(self):
+        """
+        Return the top predicted label string, or None if no prediction available.
+        """
+        preds = self.latest_preds
+        if not preds:
+            return None
+        return preds[0][0]
+
+    def get_hand_predictions(self):
+        """Return the per-hand predictions of the latest frame (see ChordTracker.get_hand_predictions)."""
+        return list(self.latest_hand_preds)
+
+    def wait_for_prediction(self, timeout=None):
+        """
+        Block until the tracker publishes a new top-K list and return it.
+        Returns None if nothing new arrives within `timeout` seconds.
+        """
+        self._read_predictions()
+        seq = self._preds_seq
+        slot = self._slots["predictions"] if self._started else None
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while self._started and not slot.interrupted:
+            remaining = None if deadline is None else deadline - time.perf_counter()
+            if remaining is not None and remaining <= 0:
+                return None
+            # Woken by the child's next write (or stop())
+            slot.wait(seq, remaining)
+            self._read_predictions()
+            if self._preds_seq != seq:
+                return self._latest_preds
+        return None
+
+    def iter_predictions(self, timeout=None):
+        """
+        Yield every new top-K list as it is published. Stops when nothing arrives
+        within `timeout` seconds or the tracker stops. Lists published while the
+        consumer is busy are skipped; the newest one is always delivered.
+        """
+        while True:
+            preds = self.wait_for_prediction(timeout)
+            if preds is None:
+                return
+            yield preds
+
+    def subscribe(self, callback):
+        """
+        Call callback(preds) with every new top-K list, on a thread in this process
+        that sleeps until the child publishes. Returns a function that unsubscribes.
+        """
+        self._subscribers.append(callback)
+        if self._started:
+            self._start_poller()
+
+        def unsubscribe():
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    def _start_poller(self):
+        if self._poller is None:
+            self._poller = threading.Thread(target=self._poll, name="chord-tracker-poller", daemon=True)
+            self._poller.start()
+
+    def _poll(self):
+        # Other readers may pull a value from the slot first, so track what was delivered
+        slot = self._slots["predictions"]
+        delivered = self._preds_seq
+        # The slot stays interrupted after stop(), so a poller outliving it can't run on
+        # into a restart
+        while self._started and not slot.interrupted:
+            slot.wait(delivered)
+            self._read_predictions()
+            with self._preds_lock:
+                seq, preds = self._preds_seq, self._latest_preds
+            if seq == delivered:
+                continue
+            delivered = seq
+            for callback in list(self._subscribers):
+                try:
+                    callback(preds)
+                except Exception as e:
+                    print(f"Prediction subscriber failed: {e}")
+
+    # ================== Frames / landmarks ==================
+    def get_frame(self):
+        """Return (BGR frame, capture time.time()) of the newest frame, or None."""
+        if self._slots is None:
+            return None
+        value = self._slots["frame"].read()
+        if value is None:
+            return None
+        header = np.frombuffer(value[1], dtype=np.float64, count=FRAME_HEADER)
+        ts, h, w, c = header
+        frame = np.frombuffer(value[1], dtype=np.uint8, offset=header.nbytes).reshape(int(h), int(w), int(c))
+        return frame, float(ts)
+
+    def get_landmarks(self):
+        """Return ((N, 21, 2) pixel landmarks of the detected hands, time.time()), or None."""
+        if self._slots is None:
+            return None
+        value = self._slots["landmarks"].read()
+        if value is None:
+            return None
+        header = np.frombuffer(value[1], dtype=np.float64, count=LANDMARK_HEADER)
+        pts = np.frombuffer(value[1], dtype=np.float64, offset=header.nbytes)
+        return pts.reshape(int(header[1]), NUM_LANDMARKS, 2), float(header[0])
+
+    # ================== Statistics ==================
+    def get_stats(self):
+        """Return the child's latest get_stats() snapshot (published every STATS_INTERVAL)."""
+        if self._slots is not None:
+            value = self._slots["stats"].read(self._stats_seq)
+            if value is not None:
+                self._stats_seq, payload = value
+                self._stats = json.loads(payload)
+        return self._stats
+
+    def get_latency_stats(self):
+        return self.get_stats().get("recognizer", {})
+
+    def get_cache_stats(self):
+        return self.get_stats().get("cache", {})
+
+    def get_capture_stats(self):
+        return self.get_stats().get("capture", {})
+
+    def get_memory_stats(self):
+        return self.get_stats().get("memory", {})
+
+    def dump_stats(self, path):
+        """Write get_stats() to `path` as JSON."""
+        with open(path, "w") as f:
+            json.dump(self.get_stats(), f, indent=2)
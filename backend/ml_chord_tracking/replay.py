@@ -0,0 +1,60 @@
+## Headless replay benchmark for recorded sessions
+##
+##   python -m backend.ml_chord_tracking.replay session.npz [--dataset dataset.txt] [--repeat 5]
+##
+## Pushes every recorded frame through compute_features and the kNN ranking
+## as fast as possible and reports per-frame latency percentiles and frames/sec.
+
+import argparse
+import time
+from .dataset import Dataset, LOG_FILE
+from .hand_tracker import compute_features_batch
+from .parameters import TOP_K_DISPLAY
+from .session import Session
+from .timing import summarize, format_summary
+
+def replay(session, dataset, repeat=1):
+    """
+    Run the per-frame chord pipeline (features + top-K ranking for every hand)
+    over every frame of `session`, `repeat` times.
+    Returns (per-frame durations in seconds, total wall time in seconds).
+    """
+    durations = []
+    clock = time.perf_counter
+    start = clock()
+    for _ in range(repeat):
+        for _, hands in session.frames():
+            t0 = clock()
+            if len(hands):
+                features = compute_features_batch(hands)
+                dataset.top_k_batch(features, TOP_K_DISPLAY)
+            durations.append(clock() - t0)
+    return durations, clock() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded landmark session through the chord pipeline.")
+    parser.add_argument("session", help="session .npz written by SessionRecorder")
+    parser.add_argument("--dataset", default=LOG_FILE, help="dataset used for kNN ranking")
+    parser.add_argument("--repeat", type=int, default=1, help="number of passes over the session")
+    args = parser.parse_args(argv)
+
+    session = Session(args.session)
+    dataset = Dataset(args.dataset)
+
+    # Warm up (builds the kNN index) so it isn't counted against the first frame
+    if len(dataset) >= TOP_K_DISPLAY:
+        dataset.top_k(dataset.X[0], TOP_K_DISPLAY)
+
+    durations, total = replay(session, dataset, args.repeat)
+    hands = sum(1 for _, h in session.frames() if len(h)) * args.repeat
+
+    print(f"Session: {len(session)} frames, {session.duration:.1f}s recorded, {len(dataset)} dataset samples")
+    print(format_summary("per-frame", summarize(durations)))
+    if total > 0:
+        fps = len(durations) / total
+        print(f"throughput: {fps:.1f} frames/s ({hands} frames with a hand)")
+        if session.duration > 0:
+            print(f"real-time factor: {session.duration * args.repeat / total:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import deque
+from .parameters import MAX_RESULT_AGE_MS
+from .timing import summarize
+
+# Number of recent submit-to-result latencies kept for statistics
+LATENCY_HISTORY = 256
+
+# Frames submitted but not answered are forgotten after this many newer submissions
+MAX_IN_FLIGHT = 64
+
+class ResultBuffer:
+    """
+    Keeps MediaPipe live-stream results together with the frames they came from.
+
+    submit() hands out a strictly increasing timestamp (ms) for each frame and
+    remembers when it was sent plus any caller data about the frame (e.g. its
+    size). put() is called from the result callback with the timestamp MediaPipe
+    echoes back, so every result is paired with its own frame, and the
+    submit-to-result latency is recorded. latest() returns the newest result
+    unless it is older than max_age_ms.
+    """
+
+    def __init__(self, max_age_ms=MAX_RESULT_AGE_MS):
+        self.max_age_ms = max_age_ms
+        self._lock = threading.Lock()
+        self._last_ts = 0
+        self._in_flight = {}  # timestamp_ms -> (submit time ms, frame info)
+        self._latest = None   # (timestamp_ms, result, frame info, submit time ms)
+        self._latencies = deque(maxlen=LATENCY_HISTORY)
+        self._listeners = []
+
+        # Counters: frames submitted, results received, results for unknown or
+        # forgotten frames, and latest() calls that found only an expired result
+        self.submitted = 0
+        self.received = 0
+        self.unmatched = 0
+        self.stale = 0
+
+    @staticmethod
+    def _now_ms():
+        return time.monotonic() * 1000.0
+
+    def submit(self, info=None):
+        """Register a frame about to be sent; returns the timestamp_ms to send it with."""
+        with self._lock:
+            # MediaPipe rejects timestamps that don't increase
+            now = self._now_ms()
+            ts = max(int(now), self._last_ts + 1)
+            self._last_ts = ts
+            self._in_flight[ts] = (now, info)
+            if len(self._in_flight) > MAX_IN_FLIGHT:
+                del self._in_flight[min(self._in_flight)]
+            self.submitted += 1
+            return ts
+
+    def put(self, result, timestamp_ms):
+        """
+        Store a result for the frame submitted with `timestamp_ms` (recognizer callback).
+        Returns the info that frame was submitted with, or None if it is unknown.
+        """
+        now = self._now_ms()
+        with self._lock:
+            self.received += 1
+            if timestamp_ms not in self._in_flight:
+                self.unmatched += 1
+                return None
+            submitted_at, info = self._in_flight.pop(timestamp_ms)
+            # Results arrive in order, so older frames will never be answered
+            for ts in [t for t in self._in_flight if t < timestamp_ms]:
+                del self._in_flight[ts]
+            self._latencies.append((now - submitted_at) / 1000.0)
+            self._latest = (timestamp_ms, result, info, submitted_at)
+            listeners = list(self._listeners)
+
+        for listener in listeners:
+            listener()
+        return info
+
+    def add_listener(self, callback):
+        """Call callback() (no args, on the recognizer thread) after each stored result."""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    @property
+    def latest_timestamp(self):
+        """timestamp_ms of the newest stored result (None if none yet)."""
+        latest = self._latest
+        return latest[0] if latest is not None else None
+
+    def latest(self):
+        """
+        Return (result, timestamp_ms, frame info) of the newest result, or
+        (None, None, None) if there is none or it is older than max_age_ms.
+        """
+        with self._lock:
+            if self._latest is None:
+                return None, None, None
+            ts, result, info, submitted_at = self._latest
+            if self._now_ms() - submitted_at > self.max_age_ms:
+                self.stale += 1
+                return None, None, None
+            return result, ts, info
+
+    def latency_stats(self):
+        """summarize() of recent submit-to-result latencies, plus frame counters."""
+        with self._lock:
+            stats = summarize(list(self._latencies))
+            stats.update(submitted=self.submitted, received=self.received,
+                         unmatched=self.unmatched, stale=self.stale)
+        return stats
@@ -0,0 +1,111 @@
+import cv2
+import numpy as np
+from .hand_tracker import landmarks_to_array
+from .parameters import INFERENCE_MAX_SIDE, ROI_PADDING, ROI_MIN_SIZE, ROI_FULL_FRAME_EVERY
+
+class InferenceInput:
+    """
+    Builds the image sent to the recognizer from a camera frame.
+
+    The frame is cropped to a padded box around the hands found in the previous
+    result (full frame when tracking is lost, and every `full_frame_every`
+    submissions so new hands are still found) and downscaled so its longest side
+    is at most `max_side`. prepare() returns the image together with its region
+    (x0, y0, w, h) in frame pixels; MediaPipe landmarks are normalized to that
+    region (landmarks_to_array(hand, w, h, (x0, y0)) maps them back).
+
+    Crop, downscale and BGR -> RGB conversion write into reused buffers (grown
+    only when a larger image is needed), so the returned image is only valid
+    until the next prepare() call (mp.Image copies it). Converting after the
+    downscale also means only the recognizer-sized image is converted.
+    `buffer_bytes` tallies the sizes of the buffers (re)allocated so far.
+    """
+
+    def __init__(self, max_side=INFERENCE_MAX_SIDE, padding=ROI_PADDING,
+                 min_size=ROI_MIN_SIZE, full_frame_every=ROI_FULL_FRAME_EVERY):
+        self.max_side = max_side
+        self.padding = padding
+        self.min_size = min_size
+        self.full_frame_every = full_frame_every
+
+        # Crop for the next frame as (x0, y0, x1, y1) in frame pixels, or None
+        self._roi = None
+        self._frame_size = None
+        self._count = 0
+
+        # Reused output buffers by name ("scaled", "image")
+        self._buffers = {}
+        self.buffer_bytes = 0
+
+    def _buffer(self, name, shape, dtype):
+        """Contiguous `shape` view of a flat buffer that only grows (crop sizes vary per frame)."""
+        size = int(np.prod(shape))
+        flat = self._buffers.get(name)
+        if flat is None or flat.size < size or flat.dtype != dtype:
+            flat = np.empty(size, dtype=dtype)
+            self._buffers[name] = flat
+            self.buffer_bytes += flat.nbytes
+        return flat[:size].reshape(shape)
+
+    def prepare(self, frame, bgr=True):
+        """
+        Return (image, region) for one frame. The image is RGB; `frame` is BGR
+        (as captured) unless bgr=False, in which case it is already RGB.
+        """
+        h, w = frame.shape[:2]
+        self._frame_size = (w, h)
+        self._count += 1
+
+        roi = self._roi
+        if roi is None or (self.full_frame_every and self._count % self.full_frame_every == 0):
+            x0, y0, x1, y1 = 0, 0, w, h
+        else:
+            x0, y0 = max(0, roi[0]), max(0, roi[1])
+            x1, y1 = min(w, roi[2]), min(h, roi[3])
+            if x1 - x0 < 2 or y1 - y0 < 2:
+                x0, y0, x1, y1 = 0, 0, w, h
+
+        # A crop is a strided view; OpenCV reads it in place
+        image = frame[y0:y1, x0:x1]
+        cw, ch = x1 - x0, y1 - y0
+        longest = max(cw, ch)
+        if self.max_side and longest > self.max_side:
+            scale = self.max_side / longest
+            size = (max(1, round(cw * scale)), max(1, round(ch * scale)))
+            scaled = self._buffer("scaled", (size[1], size[0]) + image.shape[2:], image.dtype)
+            image = cv2.resize(image, size, dst=scaled, interpolation=cv2.INTER_AREA)
+
+        # MediaPipe needs a contiguous RGB buffer
+        out = self._buffer("image", image.shape, image.dtype)
+        if bgr:
+            cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=out)
+        else:
+            np.copyto(out, image)
+
+        return out, (x0, y0, cw, ch)
+
+    def update(self, hand_landmarks, region):
+        """
+        Set the crop for the next frame from a result's hands (normalized to
+        `region`). No hands, or no padding configured, means full frame.
+        """
+        if not hand_landmarks or self.padding is None or region is None:
+            self._roi = None
+            return
+
+        x0, y0, w, h = region
+        pts = np.concatenate([landmarks_to_array(hand, w, h, (x0, y0)) for hand in hand_landmarks])
+        lo = pts.min(axis=0)
+        hi = pts.max(axis=0)
+
+        # Pad the box and keep it at least min_size of the frame's shorter side
+        size = (hi - lo) * (1.0 + 2.0 * self.padding)
+        if self._frame_size is not None:
+            size = np.maximum(size, self.min_size * min(self._frame_size))
+        center = (lo + hi) / 2.0
+        x0, y0 = np.floor(center - size / 2.0).astype(int)
+        x1, y1 = np.ceil(center + size / 2.0).astype(int)
+        self._roi = (int(x0), int(y0), int(x1), int(y1))
+
+    def reset(self):
+        self._roi = None
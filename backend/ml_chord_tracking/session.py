@@ -0,0 +1,73 @@
+import numpy as np
+from .hand_tracker import NUM_LANDMARKS, landmarks_to_array
+
+# A recorded session is an .npz file with:
+#   timestamps  (F,)        float64 seconds, one per processed camera frame
+#   frame_size  (F, 2)      int32 (width, height) of each frame
+#   hand_frame  (H,)        int32 frame index each recorded hand belongs to
+#   landmarks   (H, 21, 2)  float32 landmark positions in pixels
+
+class SessionRecorder:
+    """Collects the hand landmarks the camera loop sees each frame and saves them to an .npz file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._timestamps = []
+        self._frame_size = []
+        self._hand_frame = []
+        self._landmarks = []
+
+    def __len__(self):
+        return len(self._timestamps)
+
+    def record(self, timestamp, hand_landmarks, w, h, region=None):
+        """
+        Record one w x h frame. `hand_landmarks` is the MediaPipe result's list of hands
+        (each a sequence of 21 landmarks with x/y normalized to `region` (x0, y0, w, h),
+        the whole frame by default); may be empty or None.
+        """
+        x0, y0, rw, rh = region if region is not None else (0, 0, w, h)
+        frame = len(self._timestamps)
+        self._timestamps.append(timestamp)
+        self._frame_size.append((w, h))
+        for hand in hand_landmarks or []:
+            self._hand_frame.append(frame)
+            self._landmarks.append(landmarks_to_array(hand, rw, rh, (x0, y0)))
+
+    def save(self, path=None):
+        path = path or self.path
+        np.savez_compressed(
+            path,
+            timestamps=np.asarray(self._timestamps, dtype=np.float64),
+            frame_size=np.asarray(self._frame_size, dtype=np.int32).reshape(-1, 2),
+            hand_frame=np.asarray(self._hand_frame, dtype=np.int32),
+            landmarks=np.asarray(self._landmarks, dtype=np.float32).reshape(-1, NUM_LANDMARKS, 2),
+        )
+        return path
+
+class Session:
+    """A loaded recording. frames() yields (timestamp, (n_hands, 21, 2) landmarks) per frame."""
+
+    def __init__(self, path):
+        with np.load(path) as data:
+            self.timestamps = data["timestamps"]
+            self.frame_size = data["frame_size"]
+            self.hand_frame = data["hand_frame"]
+            self.landmarks = data["landmarks"]
+
+        # Hands for frame i are landmarks[offsets[i]:offsets[i + 1]] (hand_frame is sorted)
+        self.offsets = np.searchsorted(self.hand_frame, np.arange(len(self.timestamps) + 1))
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @property
+    def duration(self):
+        """Wall-clock length of the recording in seconds."""
+        if len(self.timestamps) < 2:
+            return 0.0
+        return float(self.timestamps[-1] - self.timestamps[0])
+
+    def frames(self):
+        for i, t in enumerate(self.timestamps):
+            yield float(t), self.landmarks[self.offsets[i]:self.offsets[i + 1]]
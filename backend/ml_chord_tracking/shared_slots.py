@@ -0,0 +1,145 @@
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+
+# Header: write sequence number, payload size (both uint64)
+HEADER_BYTES = 16
+
+# Longest a reader waits for the slot lock (a writer that died mid-copy would
+# otherwise block readers forever)
+LOCK_TIMEOUT = 1.0
+
+class SharedSlot:
+    """
+    Single-writer, many-reader latest-value slot in shared memory.
+
+    Every write and read copies the payload under a process-shared
+    multiprocessing.Condition, so the lock's memory barriers make a complete
+    payload visible together with its sequence number on every platform; the
+    lock is only held for the copy. Writes notify the condition, so readers can
+    sleep in wait() until a new value arrives instead of polling; interrupt()
+    ends every wait() on this object for good (e.g. on shutdown). Only one
+    process may write a slot.
+
+    SharedSlot(capacity) creates a new block (the creator should unlink() it);
+    pass handle() to a child process (as a Process argument) and attach there
+    with SharedSlot.attach(handle).
+    """
+
+    def __init__(self, capacity=None, name=None, cond=None, context=None):
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=HEADER_BYTES + capacity)
+            if cond is None:
+                cond = (context or multiprocessing).Condition()
+        else:
+            if cond is None:
+                raise ValueError("Attaching to a slot needs its condition: use SharedSlot.attach(slot.handle())")
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self._cond = cond
+        self._interrupted = False  # set by interrupt(), read under the condition
+        self._header = np.ndarray(2, dtype=np.uint64, buffer=self.shm.buf)
+        self._data = np.ndarray(self.shm.size - HEADER_BYTES, dtype=np.uint8,
+                                buffer=self.shm.buf, offset=HEADER_BYTES)
+        self.capacity = len(self._data)
+
+    def handle(self):
+        """Picklable (name, condition) for attach() in a child process."""
+        return self.name, self._cond
+
+    @classmethod
+    def attach(cls, handle):
+        name, cond = handle
+        return cls(name=name, cond=cond)
+
+    @property
+    def seq(self):
+        """Sequence number of the last write (0 = never written)."""
+        if not self._cond.acquire(timeout=LOCK_TIMEOUT):
+            return 0
+        try:
+            return int(self._header[0]) if self._header is not None else 0
+        finally:
+            self._cond.release()
+
+    def write(self, *parts):
+        """Publish the concatenation of `parts` (bytes or contiguous arrays) as the new value."""
+        views = [np.frombuffer(p, dtype=np.uint8) if isinstance(p, (bytes, bytearray))
+                 else np.ascontiguousarray(p).reshape(-1).view(np.uint8) for p in parts]
+        total = sum(len(v) for v in views)
+        if total > self.capacity:
+            raise ValueError(f"Value of {total} bytes does not fit in a {self.capacity} byte slot")
+
+        with self._cond:
+            offset = 0
+            for v in views:
+                self._data[offset:offset + len(v)] = v
+                offset += len(v)
+            self._header[1] = total
+            self._header[0] += 1
+            self._cond.notify_all()
+
+    def read(self, after=0):
+        """
+        Return (seq, payload bytes) of the newest value, or None if nothing newer
+        than sequence number `after` has been written (or the slot is closed).
+        """
+        if not self._cond.acquire(timeout=LOCK_TIMEOUT):
+            return None
+        try:
+            if self._header is None:
+                return None
+            seq = int(self._header[0])
+            if seq <= after:
+                return None
+            return seq, self._data[:int(self._header[1])].tobytes()
+        finally:
+            self._cond.release()
+
+    def wait(self, after=0, timeout=None):
+        """
+        Block until a value newer than `after` is written, `timeout` seconds pass
+        or interrupt() is called (returns at once after it). Returns True if a
+        newer value is available.
+        """
+        if not self._cond.acquire(timeout=LOCK_TIMEOUT):
+            return False
+        try:
+            # The flag is checked under the lock interrupt() sets it under, so an
+            # interrupt between a caller's own checks and this wait is never lost
+            if not self._interrupted and self._header is not None and int(self._header[0]) <= after:
+                self._cond.wait(timeout)
+            return self._header is not None and int(self._header[0]) > after
+        finally:
+            self._cond.release()
+
+    @property
+    def interrupted(self):
+        return self._interrupted
+
+    def interrupt(self):
+        """Wake every reader blocked in wait() on this object and make later waits return at once."""
+        if self._cond.acquire(timeout=LOCK_TIMEOUT):
+            try:
+                self._interrupted = True
+                self._cond.notify_all()
+            finally:
+                self._cond.release()
+        else:
+            self._interrupted = True
+
+    def close(self):
+        if self._cond.acquire(timeout=LOCK_TIMEOUT):
+            try:
+                self._header = None
+                self._data = None
+                self._cond.notify_all()
+            finally:
+                self._cond.release()
+        else:
+            self._header = None
+            self._data = None
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
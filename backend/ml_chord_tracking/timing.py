@@ -0,0 +1,74 @@
+import time
+import numpy as np
+
+# Percentiles reported by summarize()
+PERCENTILES = (50, 95, 99)
+
+def summarize(durations):
+    """
+    Summarize a sequence of durations (seconds).
+    Returns a dict with count, mean/p50/p95/p99/max in milliseconds and the
+    rate (per second) the mean duration allows.
+    """
+    d = np.asarray(durations, dtype=np.float64)
+    if len(d) == 0:
+        return {"count": 0}
+
+    ms = d * 1000.0
+    summary = {"count": len(d), "mean_ms": float(ms.mean())}
+    for p, v in zip(PERCENTILES, np.percentile(ms, PERCENTILES)):
+        summary[f"p{p}_ms"] = float(v)
+    summary["max_ms"] = float(ms.max())
+    summary["per_sec"] = float(len(d) / d.sum()) if d.sum() > 0 else float("inf")
+    return summary
+
+def format_summary(name, summary):
+    """One-line human readable version of summarize() output."""
+    if not summary.get("count"):
+        return f"{name}: no samples"
+    parts = [f"n={summary['count']}", f"mean={summary['mean_ms']:.3f}ms"]
+    parts += [f"p{p}={summary[f'p{p}_ms']:.3f}ms" for p in PERCENTILES]
+    parts += [f"max={summary['max_ms']:.3f}ms", f"{summary['per_sec']:.1f}/s"]
+    return f"{name}: " + " ".join(parts)
+
+# Number of recent durations kept per stage
+STAGE_HISTORY = 512
+
+class StageTimers:
+    """
+    Rolling per-stage timings for the camera / recognition loop.
+
+    record(stage, seconds) stores the duration and the time it was recorded in a
+    fixed-size ring per stage (two array writes, no allocation), so it is cheap
+    enough to leave on. stats() computes percentiles and the effective rate of
+    each stage (records per second over the ring's time span) on demand.
+    """
+
+    def __init__(self, history=STAGE_HISTORY):
+        self.history = history
+        self._stages = {}
+
+    def record(self, stage, seconds, now=None):
+        ring = self._stages.get(stage)
+        if ring is None:
+            ring = self._stages[stage] = [np.zeros(self.history), np.zeros(self.history), 0]
+        durations, times, count = ring
+        i = count % self.history
+        durations[i] = seconds
+        times[i] = time.perf_counter() if now is None else now
+        ring[2] = count + 1
+
+    def stats(self):
+        """{stage: summarize() of recent durations + total count and effective fps}."""
+        out = {}
+        for stage, (durations, times, count) in list(self._stages.items()):
+            n = min(count, self.history)
+            summary = summarize(durations[:n].copy())
+            span = times[:n].max() - times[:n].min() if n > 1 else 0.0
+            summary["total"] = count
+            summary["fps"] = float((n - 1) / span) if span > 0 else 0.0
+            out[stage] = summary
+        return out
+
+    def reset(self):
+        self._stages = {}
@@ -0,0 +1,149 @@
+## Offline pitch analysis of recorded takes
+##
+##   python analyze_wav.py take.wav [--out notes.csv | --out notes.json]
+##   python analyze_wav.py recordings/ --preset guitar_listener --tolerance 0.6
+##
+## Streams each WAV file (or every .wav in a directory) through the same
+## PitchAnalyzer the live pipeline uses, hop by hop and as fast as possible,
+## prints or writes the note timeline and reports the real-time factor.
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+import audio
+import guitar_listener
+from audio_engine import HOP_SIZE, PitchAnalyzer
+from audio_inputs import read_wav
+
+# Detector settings of the live entry points
+PRESETS = {
+    "audio": audio.PITCH_OPTIONS,
+    "guitar_listener": guitar_listener.PITCH_OPTIONS,
+}
+
+TIMELINE_FIELDS = ["file", "onset_time", "note", "midi", "frequency", "confidence"]
+
+def analyze_samples(samples, samplerate, options):
+    """
+    Run a fresh PitchAnalyzer(**options) over `samples` hop by hop.
+    Returns (list of NoteEvent with onset_time in seconds from the start, seconds spent).
+    """
+    analyzer = PitchAnalyzer(samplerate=samplerate, **options)
+    hop_size = analyzer.hop_size
+    # aubio wants exactly hop_size samples per call; zero-pad the last hop
+    n_hops = -(-len(samples) // hop_size)
+    padded = np.zeros(n_hops * hop_size, dtype=np.float32)
+    padded[:len(samples)] = samples
+
+    events = []
+    start = time.perf_counter()
+    for hop in padded.reshape(n_hops, hop_size):
+        event = analyzer.process(hop)
+        if event is not None:
+            events.append(event)
+    return events, time.perf_counter() - start
+
+def list_wavs(path):
+    """`path` itself, or the .wav files in it (sorted) if it is a directory."""
+    if os.path.isdir(path):
+        return sorted(os.path.join(path, name) for name in os.listdir(path) if name.lower().endswith(".wav"))
+    return [path]
+
+def analyze_paths(paths, options):
+    """
+    Analyze every WAV file under `paths`. Returns (timeline rows, per-file
+    summaries) where rows are dicts with TIMELINE_FIELDS.
+    """
+    rows = []
+    summaries = []
+    for path in paths:
+        for wav in list_wavs(path):
+            t = time.perf_counter()
+            samples, rate = read_wav(wav)
+            load_seconds = time.perf_counter() - t
+
+            events, seconds = analyze_samples(samples, rate, options)
+            rows.extend(
+                {"file": wav, "onset_time": round(e.onset_time, 4), "note": e.note, "midi": e.midi,
+                 "frequency": round(e.frequency, 2), "confidence": round(e.confidence, 3)}
+                for e in events
+            )
+            summaries.append({
+                "file": wav,
+                "audio_seconds": len(samples) / rate,
+                "analysis_seconds": seconds,
+                "load_seconds": load_seconds,
+                "notes": len(events),
+                "hops": -(-len(samples) // options.get("hop_size", HOP_SIZE)),
+            })
+    return rows, summaries
+
+def write_timeline(rows, out, fmt):
+    if fmt == "json":
+        json.dump(rows, out, indent=2)
+        out.write("\n")
+    else:
+        writer = csv.DictWriter(out, fieldnames=TIMELINE_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze WAV files offline with the live pitch detector.")
+    parser.add_argument("paths", nargs="+", help="WAV files or directories of WAV files")
+    parser.add_argument("--out", help="write the note timeline here (.csv or .json); default: stdout")
+    parser.add_argument("--format", choices=("csv", "json"), help="timeline format (default: from --out, else csv)")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="audio", help="start from these detector settings")
+    parser.add_argument("--method", help="aubio pitch method")
+    parser.add_argument("--buffer", type=int, help="analysis buffer size (samples)")
+    parser.add_argument("--hop", type=int, help="hop size (samples)")
+    parser.add_argument("--tolerance", type=float, help="pitch_detector.set_tolerance")
+    parser.add_argument("--silence", type=float, help="pitch_detector.set_silence (dB)")
+    parser.add_argument("--confidence", type=float, help="minimum pitch confidence")
+    parser.add_argument("--min-frequency", type=float, help="ignore pitches below this (Hz)")
+    args = parser.parse_args(argv)
+
+    options = dict(PRESETS[args.preset])
+    overrides = {
+        "method": args.method, "buf_size": args.buffer, "hop_size": args.hop,
+        "tolerance": args.tolerance, "silence": args.silence,
+        "confidence": args.confidence, "min_frequency": args.min_frequency,
+    }
+    options.update({key: value for key, value in overrides.items() if value is not None})
+
+    rows, summaries = analyze_paths(args.paths, options)
+    if not summaries:
+        print("No WAV files found", file=sys.stderr)
+        return
+
+    fmt = args.format or ("json" if args.out and args.out.lower().endswith(".json") else "csv")
+    if args.out:
+        with open(args.out, "w", newline="") as f:
+            write_timeline(rows, f, fmt)
+    else:
+        write_timeline(rows, sys.stdout, fmt)
+
+    # Report on stderr so the timeline on stdout stays machine-readable
+    for s in summaries:
+        rtf = s["audio_seconds"] / s["analysis_seconds"] if s["analysis_seconds"] > 0 else float("inf")
+        print(f"{s['file']}: {s['audio_seconds']:.1f}s audio, {s['notes']} notes, "
+              f"analysis {s['analysis_seconds'] * 1000:.0f} ms ({rtf:.0f}x real time)", file=sys.stderr)
+    audio_total = sum(s["audio_seconds"] for s in summaries)
+    analysis_total = sum(s["analysis_seconds"] for s in summaries)
+    load_total = sum(s["load_seconds"] for s in summaries)
+    hops_total = sum(s["hops"] for s in summaries)
+    if analysis_total > 0:
+        print(f"total: {audio_total:.1f}s audio in {analysis_total:.2f}s "
+              f"(real-time factor {audio_total / analysis_total:.0f}x, "
+              f"{audio_total / (analysis_total + load_total):.0f}x including file reading, "
+              f"{analysis_total / hops_total * 1e6:.0f} us per hop)", file=sys.stderr)
+    if args.out:
+        print(f"Wrote {len(rows)} notes to '{args.out}'", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+import math
+import threading
+import time
+from collections import deque, namedtuple
+
+import aubio
+import numpy as np
+
+from ring_buffer import SampleRing
+
+NOTE_NAMES = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
+
+# Defaults shared by every entry point (audio.py / guitar_listener.py override some)
+SAMPLE_RATE = 44100
+BUFFER_SIZE = 2048
+HOP_SIZE = 512
+CONFIDENCE_THRESHOLD = 0.8
+
+# Samples the ring between the input callback and the analysis thread can hold
+RING_SECONDS = 2.0
+
+# Note events: at most this many are queued (the oldest are dropped first)
+EVENT_QUEUE_SIZE = 64
+# An onset is reported once a confident pitch follows within this many seconds
+ONSET_PITCH_WINDOW = 0.1
+# A note ends after this many hops without a confident pitch (so brief dips in
+# confidence during a sustained note don't start a new one)
+NOTE_RELEASE_HOPS = 4
+# Without an onset, a different pitch only starts a new note once it has held for
+# this many hops (~115 ms at 512 / 44100), so drift, vibrato across a semitone
+# boundary and short octave jumps during one sustained note don't re-trigger
+NOTE_CHANGE_HOPS = 10
+# Peak-picking threshold of the onset detector (aubio's hfc default is ~0.06).
+# Re-plucks of a ringing string barely change its level, so onsets are the only
+# way to tell them apart; at the default, vibrato on a clean (noise-free) tone
+# also fires an onset every cycle, while 0.3 keeps every re-pluck in
+# benchmark_pitch.py and costs no single-pluck detections
+ONSET_THRESHOLD = 0.3
+
+# One played note: name ("A2"), MIDI number, frequency (Hz), pitch confidence and
+# onset time (seconds; see PitchAnalyzer.process / AudioEngine.get_note_events)
+NoteEvent = namedtuple("NoteEvent", ["note", "midi", "frequency", "confidence", "onset_time"])
+
+def hz_to_midi(freq):
+    return int(round(69 + 12 * math.log2(freq / 440.0)))
+
+def midi_to_note(midi):
+    return f"{NOTE_NAMES[midi % 12]}{midi // 12 - 1}"
+
+def hz_to_note(freq):
+    if freq <= 0:
+        return "--"
+    return midi_to_note(hz_to_midi(freq))
+
+class PitchAnalyzer:
+    """
+    The analysis core: aubio pitch + onset detection over consecutive hops.
+
+    process(hop) takes the next `hop_size` samples, updates latest_note /
+    latest_frequency / latest_confidence and returns a NoteEvent when a note
+    starts, else None: an onset followed by a confident pitch (including a
+    re-pluck of the sounding note), a confident pitch after silence, or the
+    pitch holding another note for NOTE_CHANGE_HOPS hops without an onset (a
+    slide; octave jumps are not new notes). Event onset times are in seconds
+    of audio processed by this analyzer.
+
+    method: aubio pitch method ('yin', 'yinfft', 'mcomb', 'fcomb', 'schmitt', 'default').
+    tolerance / silence: passed to set_tolerance / set_silence (None = aubio default).
+    confidence: minimum pitch confidence (a pitch needs confidence >= it, or > it
+    with strict_confidence); min_frequency: only pitches above it count.
+    onset_method / onset_threshold: aubio onset function and its peak-picking threshold.
+    """
+
+    def __init__(self, method="yin", buf_size=BUFFER_SIZE, hop_size=HOP_SIZE, samplerate=SAMPLE_RATE,
+                 tolerance=None, silence=None, confidence=CONFIDENCE_THRESHOLD, min_frequency=0.0,
+                 onset_method="hfc", onset_threshold=ONSET_THRESHOLD, strict_confidence=False):
+        self.hop_size = hop_size
+        self.samplerate = samplerate
+        self.confidence = confidence
+        self.min_frequency = min_frequency
+        self.strict_confidence = strict_confidence
+
+        self.pitch_detector = aubio.pitch(method, buf_size, hop_size, samplerate)
+        self.pitch_detector.set_unit("Hz")
+        if tolerance is not None:
+            self.pitch_detector.set_tolerance(tolerance)
+        if silence is not None:
+            self.pitch_detector.set_silence(silence)
+
+        self.onset_detector = aubio.onset(onset_method, buf_size, hop_size, samplerate)
+        self.onset_detector.set_silence(silence if silence is not None else -40)
+        self.onset_detector.set_minioi_ms(50)
+        self.onset_detector.set_threshold(onset_threshold)
+
+        self.latest_note = None
+        self.latest_frequency = 0.0
+        self.latest_confidence = 0.0
+
+        self.samples = 0             # samples processed; the detectors' get_last() uses the same count
+        self._pending_onset = None   # sample position of an onset still waiting for a pitch
+        self._current_midi = None    # MIDI number of the sounding note
+        self._unvoiced_hops = 0
+        self._candidate_midi = None  # a different pitch heard without an onset...
+        self._candidate_start = 0    # ...since this sample position
+        self._candidate_hops = 0
+        self._fade_in_at = None      # sample position of a note reported without an onset
+        self._released_midi = None   # the note that last ended for lack of a confident pitch...
+        self._released_at = 0        # ...at this sample position
+
+    def process(self, samples):
+        """Analyze the next hop (float32, hop_size samples). Returns a NoteEvent or None."""
+        # aubio returns a buffer; take first element
+        pitch = float(self.pitch_detector(samples)[0])
+        confidence = float(self.pitch_detector.get_confidence())
+        self.latest_frequency = pitch
+        self.latest_confidence = confidence
+
+        if self.onset_detector(samples)[0] > 0:
+            self._pending_onset = self.onset_detector.get_last()
+        elif (self._pending_onset is not None
+              and self.samples - self._pending_onset > ONSET_PITCH_WINDOW * self.samplerate):
+            self._pending_onset = None
+
+        event = None
+        confident = confidence > self.confidence if self.strict_confidence else confidence >= self.confidence
+        if pitch > self.min_frequency and confident:
+            midi = hz_to_midi(pitch)
+            self.latest_note = midi_to_note(midi)
+
+            if self._pending_onset is None and self._current_midi is None:
+                if (midi == self._released_midi
+                        and self.samples - self._released_at <= NOTE_CHANGE_HOPS * self.hop_size):
+                    # The note that just dropped out is still ringing: not a new one
+                    self._fade_in_at = None
+                else:
+                    # A note fading in after silence (or whose onset the detector reports late)
+                    event = NoteEvent(self.latest_note, midi, pitch, confidence, self.samples / self.samplerate)
+                    self._fade_in_at = self.samples
+                self._current_midi = midi
+                self._candidate_midi = None
+            elif self._pending_onset is not None:
+                # A new pluck, unless it is the attack of the note that just faded in
+                if (midi != self._current_midi or self._fade_in_at is None
+                        or self._pending_onset - self._fade_in_at > ONSET_PITCH_WINDOW * self.samplerate):
+                    event = NoteEvent(self.latest_note, midi, pitch, confidence,
+                                      self._pending_onset / self.samplerate)
+                self._pending_onset = None
+                self._fade_in_at = None
+                self._current_midi = midi
+                self._candidate_midi = None
+            elif midi != self._current_midi:
+                # The pitch moved without an onset: only a slide / hammer-on once it holds
+                if midi != self._candidate_midi:
+                    self._candidate_midi = midi
+                    self._candidate_start = self.samples
+                    self._candidate_hops = 0
+                self._candidate_hops += 1
+                if self._candidate_hops >= NOTE_CHANGE_HOPS:
+                    if (midi - self._current_midi) % 12:
+                        event = NoteEvent(self.latest_note, midi, pitch, confidence,
+                                          self._candidate_start / self.samplerate)
+                    self._current_midi = midi
+                    self._candidate_midi = None
+            else:
+                self._candidate_midi = None
+            self._unvoiced_hops = 0
+        else:
+            self.latest_note = None
+            self._unvoiced_hops += 1
+            if self._unvoiced_hops >= NOTE_RELEASE_HOPS:
+                if self._current_midi is not None:
+                    self._released_midi = self._current_midi
+                    self._released_at = self.samples
+                self._current_midi = None
+                self._candidate_midi = None
+
+        self.samples += len(samples)
+        return event
+
+class AudioEngine:
+    """
+    Audio input + analysis pipeline shared by audio.py and guitar_listener.py.
+
+    The input backend (see audio_inputs.py) only copies samples into a
+    preallocated SampleRing from its callback / thread and signals an Event; a
+    dedicated analysis thread sleeps on that Event and drains the ring in
+    hop-sized chunks through a PitchAnalyzer.
+
+    source: an audio_inputs input (SoundDeviceInput, PyAudioInput, WavFileInput, SyntheticInput).
+    analyzer_options: keyword arguments for PitchAnalyzer (its samplerate comes from the source).
+    """
+
+    def __init__(self, source, analyzer_options=None, ring_seconds=RING_SECONDS,
+                 event_queue_size=EVENT_QUEUE_SIZE):
+        self.source = source
+        self.analyzer_options = dict(analyzer_options or {})
+        self.analyzer = None
+
+        self._ring = SampleRing(int(source.samplerate * ring_seconds))
+        self._hop = None
+        self._data_ready = threading.Event()   # set by the input after each write
+        self._space_ready = threading.Event()  # set by the analysis thread after each hop read
+        self._thread = None
+        self._running = False
+
+        # Note events for the caller (deque appends/pops are thread-safe)
+        self._events = deque(maxlen=event_queue_size)
+        self.events_dropped = 0
+        self.hops_analyzed = 0
+        self._start_time = 0.0  # perf_counter() when analysis started (stream time 0)
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        """Start the analysis thread and the input. Raises if the input can't be opened."""
+        if self._running:
+            return
+        self.analyzer = PitchAnalyzer(samplerate=self.source.samplerate, **self.analyzer_options)
+        self._hop = np.zeros(self.analyzer.hop_size, dtype=np.float32)
+        self._ring.reset()
+        self._data_ready.clear()
+        self._space_ready.clear()
+        self._events.clear()
+        self._start_time = time.perf_counter()
+
+        self._running = True
+        self._thread = threading.Thread(target=self._analysis_loop, name="audio-analysis", daemon=True)
+        self._thread.start()
+        try:
+            # Offline inputs (e.g. a WAV file played as fast as possible) wait for
+            # room in the ring instead of dropping samples
+            self.source.start(self._write_blocking if self.source.blocking else self._write)
+        except Exception:
+            self._stop_analysis()
+            raise
+
+    def stop(self):
+        """Stop the input and the analysis thread."""
+        try:
+            self.source.stop()
+        finally:
+            self._stop_analysis()
+
+    def _write(self, samples):
+        # Runs on the input's callback / thread: copy and wake the analysis thread
+        self._ring.write(samples)
+        self._data_ready.set()
+
+    def _write_blocking(self, samples):
+        # Runs on an offline input's thread: store everything, waiting while the ring is full
+        pos = 0
+        while pos < len(samples) and self._running:
+            # Clear before checking: a hop read after the check sets it again
+            self._space_ready.clear()
+            free = self._ring.capacity - self._ring.available
+            if free == 0:
+                self._space_ready.wait()
+                continue
+            pos += self._ring.write(samples[pos:pos + free])
+            self._data_ready.set()
+
+    def _stop_analysis(self):
+        self._running = False
+        self._data_ready.set()
+        self._space_ready.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _analysis_loop(self):
+        while self._running:
+            # Clear before draining: a write after the last read sets it again
+            self._data_ready.clear()
+            while self._ring.read_into(self._hop):
+                self._space_ready.set()
+                event = self.analyzer.process(self._hop)
+                self.hops_analyzed += 1
+                if event is not None:
+                    if len(self._events) == self._events.maxlen:
+                        self.events_dropped += 1
+                    self._events.append(event)
+            self._data_ready.wait()
+
+    def get_pitch(self):
+        """Return the note of the most recent hop (e.g. 'A4') or None."""
+        if not self._running or self.analyzer is None:
+            return None
+        return self.analyzer.latest_note
+
+    def get_note_events(self):
+        """
+        Return every NoteEvent detected since the last call, oldest first, with
+        onset_time on the time.perf_counter() clock (at most event_queue_size;
+        older ones are dropped).
+        """
+        events = []
+        while True:
+            try:
+                event = self._events.popleft()
+            except IndexError:
+                return events
+            events.append(event._replace(onset_time=self._start_time + event.onset_time))
+
+    def get_stats(self):
+        """
+        Return pipeline counters:
+          ring_overflows / dropped_samples   - input blocks that did not fit in the ring
+                                               (analysis fell behind) and the samples lost
+          input_overflows / input_underflows - status flags reported by the input backend
+          hops_analyzed, backlog_samples
+          events_dropped                     - note events dropped because nobody drained the queue
+        """
+        return {
+            "ring_overflows": self._ring.overflows,
+            "dropped_samples": self._ring.dropped,
+            "input_overflows": self.source.input_overflows,
+            "input_underflows": self.source.input_underflows,
+            "hops_analyzed": self.hops_analyzed,
+            "backlog_samples": self._ring.available,
+            "events_dropped": self.events_dropped,
+        }
@@ -0,0 +1,295 @@
+import os
+import threading
+from abc import ABC, abstractmethod
+import time
+import wave
+
+import numpy as np
+
+from audio_engine import SAMPLE_RATE, HOP_SIZE
+
+class AudioInput(ABC):
+    """
+    Base class for AudioEngine inputs. start(write) begins delivering mono
+    float32 blocks by calling write(samples) from the input's own callback or
+    thread (write must stay cheap: AudioEngine's copies into a SampleRing and
+    sets an Event); stop() ends it. `finished` is True once a finite input has
+    delivered everything. input_overflows / input_underflows count backend
+    status flags. `blocking` inputs (offline playback) get a write() that waits
+    for room instead of dropping samples when analysis falls behind.
+    """
+
+    blocking = False
+
+    def __init__(self, samplerate=SAMPLE_RATE, blocksize=HOP_SIZE):
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.input_overflows = 0
+        self.input_underflows = 0
+        self.finished = False
+
+    @abstractmethod
+    def start(self, write):
+        """Begin calling write(samples) with each new block."""
+
+    def stop(self):
+        pass
+
+class SoundDeviceInput(AudioInput):
+    """
+    Live input through sounddevice (PortAudio callback). Uses the first input
+    device whose name contains `device_name`, else the default device.
+    """
+
+    def __init__(self, device_name="Aggregate Device", samplerate=SAMPLE_RATE, blocksize=HOP_SIZE):
+        super().__init__(samplerate, blocksize)
+        self.device_name = device_name
+        self._stream = None
+        self._write = None
+
+    def _find_device(self, sd):
+        # --- DEVICE SELECTION LOGIC ---
+        selected_device_index = None
+        selected_device_name = "Default"
+
+        # List all devices and look for the target
+        for i, device in enumerate(sd.query_devices()):
+            # We check if the name matches and if it actually has input channels
+            if self.device_name and self.device_name in device['name'] and device['max_input_channels'] > 0:
+                selected_device_index = i
+                selected_device_name = device['name']
+                break
+
+        print(f"--------------------------------------------------")
+        print(f"AUDIO INIT: Using Device: '{selected_device_name}'")
+        print(f"AUDIO INIT: Device Index: {selected_device_index}")
+        print(f"--------------------------------------------------")
+        return selected_device_index
+
+    def _callback(self, indata, frames, time, status):
+        # Runs on the real-time PortAudio thread: copy the samples and return
+        if status:
+            if status.input_overflow:
+                self.input_overflows += 1
+            if status.input_underflow:
+                self.input_underflows += 1
+        self._write(indata[:, 0] if indata.ndim > 1 else indata)
+
+    def start(self, write):
+        import sounddevice as sd
+
+        self._write = write
+        self._stream = sd.InputStream(
+            device=self._find_device(sd),
+            samplerate=self.samplerate,
+            blocksize=self.blocksize,
+            dtype='float32',
+            channels=1,
+            callback=self._callback,
+        )
+        self._stream.start()
+
+    def stop(self):
+        if self._stream is None:
+            return
+        try:
+            self._stream.stop()
+            self._stream.close()
+        finally:
+            self._stream = None
+
+class PyAudioInput(AudioInput):
+    """Live input through PyAudio on the default device (callback mode)."""
+
+    def __init__(self, samplerate=SAMPLE_RATE, blocksize=HOP_SIZE):
+        super().__init__(samplerate, blocksize)
+        self._pa = None
+        self._stream = None
+        self._write = None
+
+    def start(self, write):
+        import pyaudio
+
+        self._write = write
+        self._pa = pyaudio.PyAudio()
+
+        def callback(in_data, frame_count, time_info, status):
+            if status & pyaudio.paInputOverflow:
+                self.input_overflows += 1
+            if status & pyaudio.paInputUnderflow:
+                self.input_underflows += 1
+            self._write(np.frombuffer(in_data, dtype=np.float32))
+            return None, pyaudio.paContinue
+
+        try:
+            self._stream = self._pa.open(
+                format=pyaudio.paFloat32,
+                channels=1,
+                rate=self.samplerate,
+                input=True,
+                frames_per_buffer=self.blocksize,
+                stream_callback=callback,
+            )
+            self._stream.start_stream()
+        except Exception:
+            self._pa.terminate()
+            self._pa = None
+            raise
+
+    def stop(self):
+        if self._stream:
+            try:
+                self._stream.stop_stream()
+                self._stream.close()
+            except Exception:
+                pass
+            self._stream = None
+        if self._pa:
+            self._pa.terminate()
+            self._pa = None
+
+class _PlaybackInput(AudioInput):
+    """Feeds a prepared sample array block by block from a thread (paced if realtime)."""
+
+    def __init__(self, samples, samplerate, blocksize=HOP_SIZE, realtime=True, loop=False):
+        super().__init__(samplerate, blocksize)
+        self.samples = samples
+        self.realtime = realtime
+        self.blocking = not realtime
+        self.loop = loop
+        self._thread = None
+        self._running = False
+
+    def start(self, write):
+        self.finished = False
+        self._running = True
+        self._thread = threading.Thread(target=self._run, args=(write,), name="audio-playback", daemon=True)
+        self._thread.start()
+
+    def _run(self, write):
+        period = self.blocksize / self.samplerate
+        next_time = time.perf_counter()
+        pos = 0
+        while self._running:
+            if pos >= len(self.samples):
+                if not self.loop or len(self.samples) == 0:
+                    break
+                pos = 0
+            write(self.samples[pos:pos + self.blocksize])
+            pos += self.blocksize
+
+            if self.realtime:
+                next_time += period
+                delay = next_time - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+        self.finished = True
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+def read_wav(path):
+    """Read a PCM WAV file as (mono float32 samples in [-1, 1], sample rate)."""
+    with wave.open(path, "rb") as f:
+        channels = f.getnchannels()
+        width = f.getsampwidth()
+        rate = f.getframerate()
+        data = f.readframes(f.getnframes())
+
+    if width == 1:
+        samples = (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif width == 2:
+        samples = np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+    elif width == 3:
+        raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3)
+        ints = (raw[:, 0].astype(np.int32) | (raw[:, 1].astype(np.int32) << 8)
+                | (raw[:, 2].astype(np.int8).astype(np.int32) << 16))
+        samples = ints.astype(np.float32) / 8388608.0
+    elif width == 4:
+        samples = np.frombuffer(data, dtype="<i4").astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"Unsupported WAV sample width {width} in '{path}'")
+
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+    return np.ascontiguousarray(samples, dtype=np.float32), rate
+
+class WavFileInput(_PlaybackInput):
+    """A WAV file played back at its own sample rate (realtime=False: as fast as possible)."""
+
+    def __init__(self, path, blocksize=HOP_SIZE, realtime=True, loop=False):
+        samples, rate = read_wav(path)
+        super().__init__(samples, rate, blocksize, realtime, loop)
+        self.path = path
+
+def karplus_strong(frequency, duration, samplerate=SAMPLE_RATE, amplitude=0.5, decay=0.996, rng=None):
+    """
+    Plucked-string tone by Karplus-Strong synthesis: a noise burst one period
+    long, fed back through a two-point averaging filter scaled by `decay`.
+    Returns float32 samples.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    n = int(duration * samplerate)
+    # The averaging filter adds half a sample of delay
+    period = max(2, int(round(samplerate / frequency - 0.5)))
+
+    # y[i] = decay * (y[i - period] + y[i - period - 1]) / 2; buf[0] is the y[-1] = 0 seed
+    buf = np.zeros(n + period + 1, dtype=np.float64)
+    burst = rng.uniform(-1.0, 1.0, period)
+    buf[1:period + 1] = burst - burst.mean()
+    # Every sample depends on samples at least one period back, so fill a period per step
+    for start in range(period + 1, len(buf), period):
+        stop = min(start + period, len(buf))
+        buf[start:stop] = decay * 0.5 * (buf[start - period:stop - period] + buf[start - period - 1:stop - period - 1])
+
+    out = buf[1:n + 1]
+    peak = np.abs(out).max() if n else 0.0
+    return (out * (amplitude / peak if peak > 0 else 0.0)).astype(np.float32)
+
+def synthesize_notes(notes, samplerate=SAMPLE_RATE, amplitude=0.5, noise=0.0, rng=None):
+    """
+    Concatenate plucked notes given as (frequency Hz, seconds) pairs (frequency
+    0 = silence) and add white noise of standard deviation `noise`.
+    """
+    rng = np.random.default_rng(0) if rng is None else rng
+    parts = [
+        karplus_strong(freq, seconds, samplerate, amplitude, rng=rng) if freq > 0
+        else np.zeros(int(seconds * samplerate), dtype=np.float32)
+        for freq, seconds in notes
+    ]
+    samples = np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+    if noise > 0:
+        samples = samples + rng.normal(0.0, noise, len(samples)).astype(np.float32)
+    return samples.astype(np.float32)
+
+# Default synthetic input: the open strings, low to high, then silence
+OPEN_STRINGS_HZ = [82.41, 110.0, 146.83, 196.0, 246.94, 329.63]
+SYNTHETIC_NOTES = [(f, 0.75) for f in OPEN_STRINGS_HZ] + [(0, 0.5)]
+
+class SyntheticInput(_PlaybackInput):
+    """Generated plucked-string notes (see synthesize_notes), looped by default."""
+
+    def __init__(self, notes=SYNTHETIC_NOTES, samplerate=SAMPLE_RATE, blocksize=HOP_SIZE,
+                 amplitude=0.5, noise=0.0, realtime=True, loop=True):
+        samples = synthesize_notes(notes, samplerate, amplitude, noise)
+        super().__init__(samples, samplerate, blocksize, realtime, loop)
+
+def open_input(source="sounddevice", samplerate=SAMPLE_RATE, blocksize=HOP_SIZE, realtime=True):
+    """
+    Build an input from a spec: an AudioInput (returned as is), "sounddevice",
+    "pyaudio", "synthetic" or a .wav file path.
+    """
+    if isinstance(source, AudioInput):
+        return source
+    if source == "sounddevice":
+        return SoundDeviceInput(samplerate=samplerate, blocksize=blocksize)
+    if source == "pyaudio":
+        return PyAudioInput(samplerate=samplerate, blocksize=blocksize)
+    if source == "synthetic":
+        return SyntheticInput(samplerate=samplerate, blocksize=blocksize, realtime=realtime)
+    if isinstance(source, str) and os.path.isfile(source):
+        return WavFileInput(source, blocksize=blocksize, realtime=realtime)
+    raise ValueError(f"Unknown audio input '{source}'")
@@ -0,0 +1,320 @@
+## Pitch detection benchmark over synthetic guitar tones (no audio device needed)
+##
+##   python benchmark_pitch.py
+##   python benchmark_pitch.py --configs audio yin-1024 yinfft-2048 --group string
+##   python benchmark_pitch.py --amplitudes 0.1 --noise 0 0.05 --out results.csv
+##   python benchmark_pitch.py --configs audio --repluck-gaps 0.15 0.3 --repluck-out replucks.csv
+##
+## Plucks every string/fret position of the game (Karplus-Strong, see
+## audio_inputs.karplus_strong) at several amplitudes and noise levels, runs
+## each through every detector configuration and reports per configuration:
+##   detected     - plucks whose first reported note came after the onset
+##   octave_err   - of those, first notes a whole number of octaves off
+##   wrong        - of those, first notes off by anything else
+##   spurious     - notes reported during the silence before the pluck (per pluck)
+##   latency      - time from the pluck to the end of the hop whose analysis first
+##                  reported the correct note (median / p95; input-device buffering
+##                  comes on top of this)
+##   cpu per hop  - process CPU time of PitchAnalyzer.process (mean / p99)
+##
+## A second table covers re-plucks: REPLUCK_COUNT plucks of the same note
+## REPLUCK_GAPS seconds apart, each restarting the still-ringing string:
+##   repluck_detected - of the re-plucks (all but the first) in sequences whose
+##                      first pluck was detected, those reported as a new note
+##                      before the next pluck
+##   repluck_extra    - notes reported beyond one per pluck (per sequence)
+##   repluck_latency  - median time from a re-pluck to its note
+
+import argparse
+import csv
+import json
+import sys
+import time
+
+import numpy as np
+
+import audio
+import guitar_listener
+from audio_engine import HOP_SIZE, SAMPLE_RATE, PitchAnalyzer
+from audio_inputs import karplus_strong
+
+# Keep in sync with game.STRING_OFFSETS (note index from C; E2 = MIDI 40) and the
+# 0-12 fret range of the generated tracks
+STRING_OFFSETS = {'E': 4, 'A': 9, 'D': 14, 'G': 19, 'B': 23, 'e': 28}
+FRETS = range(13)
+
+AMPLITUDES = [0.05, 0.2, 0.8]
+NOISE_LEVELS = [0.0, 0.005, 0.02]
+
+# Silence before and length of each pluck (seconds)
+LEAD_IN = 0.1
+NOTE_SECONDS = 0.5
+
+# Re-pluck sequences: plucks per sequence and seconds between them
+REPLUCK_COUNT = 4
+REPLUCK_GAPS = [0.25, 0.5]
+
+def _method_configs(method, buf_sizes, confidence):
+    return {
+        f"{method}-{buf_size}": dict(method=method, buf_size=buf_size, hop_size=HOP_SIZE,
+                                     silence=-40, confidence=confidence)
+        for buf_size in buf_sizes
+    }
+
+# The live presets plus each aubio method at a few buffer sizes. Only the yin
+# variants report a pitch confidence; the others always report 0, so they are
+# gated by the silence threshold alone.
+DETECTOR_CONFIGS = {
+    "audio": audio.PITCH_OPTIONS,
+    "guitar_listener": guitar_listener.PITCH_OPTIONS,
+    **_method_configs("yin", (1024, 2048, 4096), 0.8),
+    **_method_configs("yinfast", (1024, 2048, 4096), 0.8),
+    **_method_configs("yinfft", (1024, 2048, 4096), 0.0),
+    **_method_configs("mcomb", (2048,), 0.0),
+    **_method_configs("fcomb", (2048,), 0.0),
+    **_method_configs("schmitt", (2048,), 0.0),
+}
+
+GROUP_KEYS = ("string", "fret", "amplitude", "noise")
+
+SUMMARY_FIELDS = ["config", "plucks", "detected", "octave_err", "wrong", "spurious",
+                  "latency_ms_median", "latency_ms_p95", "cpu_us_per_hop", "cpu_us_p99"]
+
+REPLUCK_FIELDS = ["config", "gap", "sequences", "replucks", "repluck_detected", "repluck_extra",
+                  "repluck_latency_ms_median"]
+
+def string_midi(string, fret):
+    return 36 + STRING_OFFSETS[string] + fret
+
+def make_plucks(frets=FRETS, amplitudes=AMPLITUDES, noise_levels=NOISE_LEVELS,
+                samplerate=SAMPLE_RATE, seed=0):
+    """
+    One test signal per string / fret / amplitude / noise level: LEAD_IN seconds
+    of silence then a NOTE_SECONDS pluck, with white noise over the whole signal.
+    Returns a list of (info dict, float32 samples, onset sample).
+    """
+    rng = np.random.default_rng(seed)
+    onset = int(LEAD_IN * samplerate)
+    plucks = []
+    for string in STRING_OFFSETS:
+        for fret in frets:
+            midi = string_midi(string, fret)
+            frequency = 440.0 * 2 ** ((midi - 69) / 12)
+            for amplitude in amplitudes:
+                tone = karplus_strong(frequency, NOTE_SECONDS, samplerate, amplitude, rng=rng)
+                clean = np.concatenate([np.zeros(onset, dtype=np.float32), tone])
+                for noise in noise_levels:
+                    samples = clean + rng.normal(0.0, noise, len(clean)).astype(np.float32) if noise > 0 else clean
+                    info = {"string": string, "fret": fret, "midi": midi, "amplitude": amplitude, "noise": noise}
+                    plucks.append((info, samples, onset))
+    return plucks
+
+def make_replucks(frets=FRETS, amplitudes=AMPLITUDES, noise_levels=NOISE_LEVELS, gaps=REPLUCK_GAPS,
+                  samplerate=SAMPLE_RATE, seed=0):
+    """
+    One test signal per string / fret / amplitude / noise level / gap: LEAD_IN
+    seconds of silence then REPLUCK_COUNT plucks of the note `gap` seconds apart,
+    each restarting the string while it still rings (the last rings for
+    NOTE_SECONDS). Returns a list of (info dict, float32 samples, onset samples).
+    """
+    rng = np.random.default_rng(seed)
+    lead_in = int(LEAD_IN * samplerate)
+    sequences = []
+    for string in STRING_OFFSETS:
+        for fret in frets:
+            midi = string_midi(string, fret)
+            frequency = 440.0 * 2 ** ((midi - 69) / 12)
+            for amplitude in amplitudes:
+                for gap in gaps:
+                    onsets = [lead_in + int(i * gap * samplerate) for i in range(REPLUCK_COUNT)]
+                    clean = np.zeros(onsets[-1] + int(NOTE_SECONDS * samplerate), dtype=np.float32)
+                    for start, stop in zip(onsets, onsets[1:] + [len(clean)]):
+                        clean[start:stop] = karplus_strong(frequency, (stop - start) / samplerate, samplerate,
+                                                           amplitude, rng=rng)
+                    for noise in noise_levels:
+                        samples = clean + rng.normal(0.0, noise, len(clean)).astype(np.float32) if noise > 0 else clean
+                        info = {"string": string, "fret": fret, "midi": midi, "amplitude": amplitude,
+                                "noise": noise, "gap": gap}
+                        sequences.append((info, samples, onsets))
+    return sequences
+
+def run_pluck(options, samples, onset, samplerate=SAMPLE_RATE):
+    """
+    Feed one test signal through a fresh PitchAnalyzer hop by hop. Returns
+    (notes reported before the onset, [(MIDI, sample position when reported)]
+    after it, per-hop CPU seconds).
+    """
+    analyzer = PitchAnalyzer(samplerate=samplerate, **options)
+    hop_size = analyzer.hop_size
+    n_hops = len(samples) // hop_size
+    hops = samples[:n_hops * hop_size].reshape(n_hops, hop_size)
+
+    cpu = np.empty(n_hops)
+    spurious = 0
+    notes = []
+    for i, hop in enumerate(hops):
+        start = time.process_time()
+        event = analyzer.process(hop)
+        cpu[i] = time.process_time() - start
+        if event is not None:
+            # The event is available once this hop has been analyzed
+            reported = (i + 1) * hop_size
+            if reported <= onset:
+                spurious += 1
+            else:
+                notes.append((event.midi, reported))
+    return spurious, notes, cpu
+
+def _percentile(values, q):
+    """Rounded percentile, or None for no values (e.g. nothing detected)."""
+    return round(float(np.percentile(values, q)), 1) if len(values) else None
+
+def benchmark(configs, plucks, group=(), samplerate=SAMPLE_RATE, progress=None):
+    """
+    Run every pluck through every configuration. Returns summary rows (dicts
+    with SUMMARY_FIELDS plus the `group` keys), one per configuration and group.
+    """
+    rows = []
+    for name, options in configs.items():
+        results = {}
+        for info, samples, onset in plucks:
+            spurious, notes, cpu = run_pluck(options, samples, onset, samplerate)
+            key = tuple(info[k] for k in group)
+            results.setdefault(key, []).append((info["midi"], onset, spurious, notes, cpu))
+
+        for key, trials in results.items():
+            detected = octave = wrong = spurious = 0
+            latencies = []
+            for midi, onset, n_spurious, notes, _ in trials:
+                spurious += n_spurious
+                if not notes:
+                    continue
+                detected += 1
+                first = notes[0][0]
+                if first != midi:
+                    if (first - midi) % 12 == 0:
+                        octave += 1
+                    else:
+                        wrong += 1
+                correct = [reported for note, reported in notes if note == midi]
+                if correct:
+                    latencies.append((correct[0] - onset) / samplerate * 1000)
+            cpu = np.concatenate([t[4] for t in trials]) * 1e6
+
+            row = dict(zip(group, key))
+            row.update({
+                "config": name,
+                "plucks": len(trials),
+                "detected": round(detected / len(trials), 3),
+                "octave_err": round(octave / detected, 3) if detected else None,
+                "wrong": round(wrong / detected, 3) if detected else None,
+                "spurious": round(spurious / len(trials), 3),
+                "latency_ms_median": _percentile(latencies, 50),
+                "latency_ms_p95": _percentile(latencies, 95),
+                "cpu_us_per_hop": round(float(cpu.mean()), 1),
+                "cpu_us_p99": _percentile(cpu, 99),
+            })
+            rows.append(row)
+        if progress:
+            progress(name)
+    return rows
+
+def benchmark_replucks(configs, sequences, group=(), samplerate=SAMPLE_RATE, progress=None):
+    """
+    Run every re-pluck sequence through every configuration. Returns summary
+    rows (dicts with REPLUCK_FIELDS plus the `group` keys), one per
+    configuration, gap and group.
+    """
+    rows = []
+    for name, options in configs.items():
+        results = {}
+        for info, samples, onsets in sequences:
+            _, notes, _ = run_pluck(options, samples, onsets[0], samplerate)
+            key = (info["gap"],) + tuple(info[k] for k in group)
+            results.setdefault(key, []).append((info["midi"], onsets, notes))
+
+        for key, trials in results.items():
+            replucks = detected = extra = 0
+            latencies = []
+            for midi, onsets, notes in trials:
+                extra += max(0, len(notes) - len(onsets))
+                if not notes or notes[0][1] > onsets[1]:
+                    continue
+                for start, stop in zip(onsets[1:], onsets[2:] + [np.inf]):
+                    replucks += 1
+                    own = [reported for note, reported in notes if note == midi and start < reported <= stop]
+                    if own:
+                        detected += 1
+                        latencies.append((own[0] - start) / samplerate * 1000)
+
+            row = dict(zip(group, key[1:]))
+            row.update({
+                "config": name,
+                "gap": key[0],
+                "sequences": len(trials),
+                "replucks": replucks,
+                "repluck_detected": round(detected / replucks, 3) if replucks else None,
+                "repluck_extra": round(extra / len(trials), 3),
+                "repluck_latency_ms_median": _percentile(latencies, 50),
+            })
+            rows.append(row)
+        if progress:
+            progress(name)
+    return rows
+
+def print_table(rows, fields, out=sys.stdout):
+    cells = [["-" if r[f] is None else str(r[f]) for f in fields] for r in rows]
+    widths = [max(len(f), *(len(c[i]) for c in cells)) for i, f in enumerate(fields)]
+    print("  ".join(f.ljust(w) for f, w in zip(fields, widths)), file=out)
+    for c in cells:
+        print("  ".join(v.ljust(w) for v, w in zip(c, widths)), file=out)
+
+def write_rows(rows, fields, path):
+    with open(path, "w", newline="") as f:
+        if path.lower().endswith(".json"):
+            json.dump(rows, f, indent=2)
+            f.write("\n")
+        else:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(rows)
+    print(f"Wrote {len(rows)} rows to '{path}'", file=sys.stderr)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pitch detector configurations on synthetic plucks.")
+    parser.add_argument("--configs", nargs="+", choices=list(DETECTOR_CONFIGS), default=list(DETECTOR_CONFIGS),
+                        metavar="CONFIG", help=f"configurations to run (default: all of {', '.join(DETECTOR_CONFIGS)})")
+    parser.add_argument("--frets", type=int, default=len(FRETS), help="test frets 0..N-1 on every string")
+    parser.add_argument("--amplitudes", type=float, nargs="+", default=AMPLITUDES, help="pluck peak amplitudes")
+    parser.add_argument("--noise", type=float, nargs="+", default=NOISE_LEVELS, help="white noise standard deviations")
+    parser.add_argument("--group", nargs="+", choices=GROUP_KEYS, default=[], help="also break results down by these")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repluck-gaps", type=float, nargs="*", default=REPLUCK_GAPS,
+                        help="seconds between re-plucks of one note (none: skip the re-pluck table)")
+    parser.add_argument("--out", help="also write the results here (.csv or .json)")
+    parser.add_argument("--repluck-out", help="also write the re-pluck results here (.csv or .json)")
+    args = parser.parse_args(argv)
+
+    plucks = make_plucks(range(args.frets), args.amplitudes, args.noise, seed=args.seed)
+    configs = {name: DETECTOR_CONFIGS[name] for name in args.configs}
+    print(f"{len(plucks)} plucks x {len(configs)} configurations", file=sys.stderr)
+
+    progress = lambda name: print(f"  {name} done", file=sys.stderr)
+    rows = benchmark(configs, plucks, args.group, progress=progress)
+    fields = list(args.group) + SUMMARY_FIELDS
+    print_table(rows, fields)
+    if args.out:
+        write_rows(rows, fields, args.out)
+
+    if args.repluck_gaps:
+        sequences = make_replucks(range(args.frets), args.amplitudes, args.noise, args.repluck_gaps, seed=args.seed)
+        print(f"{len(sequences)} re-pluck sequences x {len(configs)} configurations", file=sys.stderr)
+        repluck_rows = benchmark_replucks(configs, sequences, args.group, progress=progress)
+        repluck_fields = REPLUCK_FIELDS[:2] + list(args.group) + REPLUCK_FIELDS[2:]
+        print()
+        print_table(repluck_rows, repluck_fields)
+        if args.repluck_out:
+            write_rows(repluck_rows, repluck_fields, args.repluck_out)
+
+if __name__ == "__main__":
+    main()
@@ -126,16 +126,11 @@ def main():
     last_damage_time = 0
     damage_cooldown_ms = 1000 
     
-    last_shot_time = 0
-    shot_cooldown = 0.2
-
     font_go = pygame.font.SysFont(None, 120)
     font_btn = pygame.font.SysFont(None, 60)
 
     running = True
     while running:
-        current_time = pygame.time.get_ticks() / 1000.0 
-
         for event in pygame.event.get():
             if event.type == QUIT: running = False
             elif event.type == KEYDOWN and event.key == K_ESCAPE: running = False
@@ -144,18 +139,15 @@ def main():
                 if pygame.Rect(SCREEN_W//2 - 150, SCREEN_H//2 + 50, 300, 80).collidepoint(mx, my):
                     restart_game()
 
-        # --- AUDIO POLLING LOGIC ---
+        # --- AUDIO EVENT LOGIC ---
         if not game_over:
-            # 1. Get raw pitch from audio module (e.g. "A4" or "C#3")
-            raw_pitch = audio.get_pitch()
-            
-            # 2. Process pitch if it exists
-            detected_note_name = None
-            if raw_pitch and raw_pitch != "--":
-                # Strip the octave number (digits) to match game logic (e.g. "A4" -> "A")
+            # 1. Every note plucked since the last frame (e.g. "A4" or "C#3"), oldest first
+            for note_event in audio.get_note_events():
+                raw_pitch = note_event.note
+
+                # 2. Strip the octave number (digits) to match game logic (e.g. "A4" -> "A")
                 detected_note_name = ''.join([c for c in raw_pitch if not c.isdigit()])
 
-            if detected_note_name and (current_time - last_shot_time > shot_cooldown):
                 # 3. Find Targets (Only target actual enemies, not debris)
                 targets = [
                     e for e in enemies_group 
@@ -176,7 +168,6 @@ def main():
                     print(f"Shot {detected_note_name} (Raw: {raw_pitch})")
                     beam = player.shoot_particle_beam(detected_note_name, target_enemy=hit_enemy)
                     if beam: beam_group.add(beam)
-                    last_shot_time = current_time
 
             # GAME UPDATE
             game_tick_counter += 1
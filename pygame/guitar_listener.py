@@ -1,106 +1,54 @@
-import pyaudio
-import numpy as np
-import aubio
-import threading
-import time
-import math
+from audio_engine import AudioEngine, NOTE_NAMES, hz_to_note
+from audio_inputs import PyAudioInput, open_input
 
 # --- CONFIGURATION ---
 SAMPLE_RATE = 44100
-BUFFER_SIZE = 1024  
-HOP_SIZE = 512      
-CONFIDENCE_THRESH = 0.8  
-
-# Notes for mapping MIDI numbers
-NOTE_NAMES = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
+BUFFER_SIZE = 1024
+HOP_SIZE = 512
+CONFIDENCE_THRESH = 0.8
+
+# Pitch detector settings (see audio_engine.PitchAnalyzer)
+PITCH_OPTIONS = dict(
+    method="default",
+    buf_size=BUFFER_SIZE,
+    hop_size=HOP_SIZE,
+    tolerance=0.8,
+    confidence=CONFIDENCE_THRESH,
+    min_frequency=60,
+)
 
 # Global State
-_stream = None
-_pa = None
-_running = False
-_current_pitch = None
-_pitch_lock = threading.Lock()
+_engine = None
 
-def start_audio_stream():
-    global _pa, _stream, _running
-    if _running: return
+def start_audio_stream(source=None):
+    """Start listening on the default PyAudio input, or on `source` (see audio_inputs.open_input)."""
+    global _engine
+    if _engine is not None: return
 
-    _running = True
-    _pa = pyaudio.PyAudio()
-    
+    if source is None:
+        source = PyAudioInput(SAMPLE_RATE, HOP_SIZE)
+    engine = AudioEngine(open_input(source, SAMPLE_RATE, HOP_SIZE), PITCH_OPTIONS)
     try:
-        _stream = _pa.open(
-            format=pyaudio.paFloat32,
-            channels=1,
-            rate=SAMPLE_RATE,
-            input=True,
-            frames_per_buffer=HOP_SIZE
-        )
-        threading.Thread(target=_listen_loop, daemon=True).start()
-        print("🎸 Audio Stream Started (Polling Mode)")
+        engine.start()
+        _engine = engine
+        print("🎸 Audio Stream Started")
     except Exception as e:
         print(f"Failed to start audio: {e}")
-        _running = False
 
 def stop_audio_stream():
-    global _pa, _stream, _running
-    _running = False
-    if _stream:
-        try:
-            _stream.stop_stream()
-            _stream.close()
-        except: pass
-    if _pa:
-        _pa.terminate()
+    global _engine
+    if _engine:
+        _engine.stop()
+        _engine = None
 
 def get_pitch():
     """Returns the currently detected note (e.g. 'A2') or None."""
-    with _pitch_lock:
-        # We return the latest pitch. 
-        # Optional: You can set _current_pitch to None here if you only want to read it once.
-        return _current_pitch
-
-def _listen_loop():
-    global _current_pitch
-    
-    # Initialize Aubio
-    pitch_detector = aubio.pitch("default", BUFFER_SIZE, HOP_SIZE, SAMPLE_RATE)
-    pitch_detector.set_unit("Hz")
-    pitch_detector.set_tolerance(0.8)
-
-    while _running:
-        try:
-            data = _stream.read(HOP_SIZE, exception_on_overflow=False)
-            samples = np.frombuffer(data, dtype=np.float32)
-
-            pitch = pitch_detector(samples)[0]
-            confidence = pitch_detector.get_confidence()
+    return _engine.get_pitch() if _engine else None
 
-            detected_note = None
-
-            # Filter noise
-            if confidence >= CONFIDENCE_THRESH and pitch > 60:
-                detected_note = _freq_to_note(pitch)
-
-            # Update global state safely
-            with _pitch_lock:
-                _current_pitch = detected_note
-                
-        except Exception as e:
-            print(f"Audio Loop Error: {e}")
-            time.sleep(0.1)
+def get_note_events():
+    """Returns every note event detected since the last call (see audio.get_note_events)."""
+    return _engine.get_note_events() if _engine else []
 
 def _freq_to_note(freq):
-    if freq == 0: return None
-    try:
-        # Calculate MIDI number
-        midi_number = 69 + 12 * math.log2(freq / 440.0)
-        rounded_midi = int(round(midi_number))
-        
-        # Determine Note Name and Octave
-        note_name = NOTE_NAMES[rounded_midi % 12]
-        octave = int(rounded_midi / 12) - 1
-        
-        return f"{note_name}{octave}"
-    except:
-        return None
\ No newline at end of file
+    if freq <= 0: return None
+    return hz_to_note(freq)
@@ -0,0 +1,78 @@
+import numpy as np
+
+class SampleRing:
+    """
+    Preallocated single-producer / single-consumer ring of float32 samples.
+
+    The producer (audio callback) only calls write() and the consumer (analysis
+    thread) only calls read_into(); each side owns one index, so no lock is
+    needed. Nothing is allocated after construction.
+
+    write() drops whatever does not fit (counted in `overflows` / `dropped`);
+    read_into() only reads full chunks.
+    """
+
+    def __init__(self, capacity):
+        # Power-of-two size so positions wrap with a mask
+        size = 1
+        while size < capacity:
+            size *= 2
+        self._buf = np.zeros(size, dtype=np.float32)
+        self._mask = size - 1
+        self.capacity = size
+
+        # Total samples written / read so far; only the owning side updates each
+        self._write = 0
+        self._read = 0
+
+        self.overflows = 0
+        self.dropped = 0
+
+    @property
+    def available(self):
+        """Samples waiting to be read."""
+        return self._write - self._read
+
+    def write(self, samples):
+        """Copy samples in (producer side). Returns the number of samples stored."""
+        n = len(samples)
+        free = self.capacity - (self._write - self._read)
+        if n > free:
+            self.overflows += 1
+            self.dropped += n - free
+            n = free
+        if n == 0:
+            return 0
+
+        start = self._write & self._mask
+        first = min(n, self.capacity - start)
+        self._buf[start:start + first] = samples[:first]
+        if first < n:
+            self._buf[:n - first] = samples[first:n]
+        # Publish only after the samples are in place
+        self._write += n
+        return n
+
+    def read_into(self, out):
+        """
+        Fill `out` with the next len(out) samples (consumer side). Returns False,
+        leaving `out` untouched, if fewer are available.
+        """
+        n = len(out)
+        if self._write - self._read < n:
+            return False
+
+        start = self._read & self._mask
+        first = min(n, self.capacity - start)
+        out[:first] = self._buf[start:start + first]
+        if first < n:
+            out[first:] = self._buf[:n - first]
+        self._read += n
+        return True
+
+    def reset(self):
+        """Forget buffered samples and counters (only while neither side is running)."""
+        self._write = 0
+        self._read = 0
+        self.overflows = 0
+        self.dropped = 0